@@ -5,16 +5,20 @@ Starts the SSH server with room system and game engine.
 
 import argparse
 import asyncio
-import logging
-from poker.ssh_server import SSHServer
-from poker.healthcheck import start_healthcheck_in_background
+from poker.logging_setup import configure as configure_logging
 
 
 async def main(host: str, port: int):
+    # Server modules pull in asyncssh/aiohttp; import them only once we are
+    # actually starting, so `--help` and argument errors stay fast
+    from poker.ssh_server import SSHServer
+    from poker.healthcheck import start_healthcheck_in_background
+
     print("🏠 Starting Poker-over-SSH server")
     print("=" * 50)
     
     # Initialize database
+    db = None
     try:
         from poker.database import init_database
         db = init_database()
@@ -35,7 +39,15 @@ async def main(host: str, port: int):
         # best-effort, continue if healthcheck failed to start
         pass
 
-    await server.serve_forever()
+    try:
+        await server.serve_forever()
+    finally:
+        from poker.ai import close_shared_client
+        await close_shared_client()
+        if db is not None:
+            # Write out any actions still queued for the background writer
+            # and close the database connections
+            db.close_all()
 
 
 if __name__ == "__main__":
@@ -45,14 +57,7 @@ if __name__ == "__main__":
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     args = parser.parse_args()
 
-    if args.debug:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
-        logging.basicConfig(level=logging.INFO)
-    
-    # Suppress AsyncSSH's verbose window change messages
-    asyncssh_logger = logging.getLogger('asyncssh')
-    asyncssh_logger.setLevel(logging.WARNING)
+    configure_logging(args.debug)
 
     try:
         asyncio.run(main(args.host, args.port))
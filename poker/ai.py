@@ -5,14 +5,43 @@ Poker AI using OpenAI-compatible API for decision making.
 import asyncio
 import json
 import os
-import random
 import logging
-from typing import Any, Dict, Optional, Callable, Awaitable
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Callable, Awaitable, Tuple
+
+from poker.game_engine import HAND_RANKS, make_deck
+from poker.hand_evaluation import best_hand_from_seven, estimate_equity
 
 try:
-    from openai import AsyncOpenAI
+    from openai import AsyncOpenAI, BadRequestError, APIConnectionError, APIStatusError, APITimeoutError
 except ImportError:
     AsyncOpenAI = None
+    BadRequestError = None
+    APIConnectionError = None
+    APIStatusError = None
+    APITimeoutError = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import orjson
+
+    def _json_loads(text: str) -> Any:
+        return orjson.loads(text)
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _json_loads(text: str) -> Any:
+        return json.loads(text)
+
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(',', ':'))
 
 try:
     from dotenv import load_dotenv
@@ -21,15 +50,281 @@ except ImportError:
     pass
 
 
+def _classify_preflop(low: int, high: int) -> Tuple[str, int, str]:
+    """Classify a starting hand for the fallback AI as (action, raise_extra, reason)."""
+    if low == high:
+        return 'raise', 20, 'preflop pair - RAISE'
+    if high >= 12:  # face card
+        return 'raise', 15, 'preflop high card - RAISE'
+    if high >= 11:  # jack or better
+        return 'call', 0, 'preflop decent hand'
+    return 'fold', 0, 'preflop bad hand'
+
+
+# Preflop decisions only depend on the two hole-card ranks, so precompute them
+# once for every (low_rank, high_rank) pair instead of branching on every turn.
+_PREFLOP_TABLE: Dict[Tuple[int, int], Tuple[str, int, str]] = {
+    (low, high): _classify_preflop(low, high)
+    for low in range(2, 15)
+    for high in range(low, 15)
+}
+
+
+def _betting_context(game_state: Dict[str, Any], name: str) -> Tuple[int, int, int]:
+    """Return (current_bet, my_bet, call_amount) for this betting round.
+
+    Uses the engine's round_bets and incrementally maintained current_bet when
+    present; otherwise falls back to a single pass over bets.
+    """
+    bets = game_state.get('round_bets')
+    if bets is None:
+        bets = game_state.get('bets', {})
+    my_bet = bets.get(name, 0)
+    current_bet = game_state.get('current_bet')
+    if current_bet is None:
+        current_bet = max(bets.values(), default=0)
+    return current_bet, my_bet, max(current_bet - my_bet, 0)
+
+
+def _classify_api_error(error: Exception) -> str:
+    """Classify a failed AI request as 'blocked', 'timeout', 'connection' or 'other'."""
+    if isinstance(error, asyncio.TimeoutError):
+        return 'timeout'
+    if AsyncOpenAI is None:
+        return 'other'
+    # APITimeoutError subclasses APIConnectionError, so check it first
+    if isinstance(error, APITimeoutError):
+        return 'timeout'
+    if isinstance(error, APIConnectionError):
+        return 'connection'
+    if isinstance(error, APIStatusError):
+        # Cloudflare answers blocks and origin failures itself and tags them with cf-ray
+        status = error.response.status_code
+        if (status in (403, 503) or 520 <= status <= 530) and 'cf-ray' in error.response.headers:
+            return 'blocked'
+    return 'other'
+
+
+# Every AI seat talks to the same endpoint, so share one client (and its
+# HTTP connection pool) instead of opening a new one per PokerAI instance.
+_shared_client = None
+_shared_client_key: Optional[Tuple[str, str, float]] = None
+
+# Last reachability probe as (client, monotonic time, result); seats share
+# one client, so a fresh result is reused instead of probing per seat
+_CONNECTION_PROBE_TTL = 60.0
+_connection_probe: Optional[Tuple[Any, float, bool]] = None
+
+# Caps concurrent completion requests across all tables to avoid rate limits
+_request_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_shared_client(api_key: str, base_url: str, timeout: float):
+    """Return the process-wide AsyncOpenAI client for this endpoint configuration."""
+    global _shared_client, _shared_client_key
+    key = (api_key, base_url, timeout)
+    if _shared_client is None or _shared_client_key != key:
+        http_client = None
+        if httpx is not None:
+            # Keep enough pooled connections for every concurrent request slot
+            slots = _max_concurrency()
+            http_client = httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=slots * 2, max_keepalive_connections=slots),
+            )
+        _shared_client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, http_client=http_client)
+        _shared_client_key = key
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """Close the shared AI client's connections; call once on server shutdown."""
+    global _shared_client, _shared_client_key
+    client, _shared_client, _shared_client_key = _shared_client, None, None
+    if client is not None:
+        try:
+            await client.close()
+        except Exception as e:
+            logging.debug(f"Error closing AI client: {e}")
+
+
+def _max_concurrency() -> int:
+    return max(1, int(os.getenv('AI_MAX_CONCURRENCY', '8')))
+
+
+def _get_request_slots() -> asyncio.Semaphore:
+    global _request_slots
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(_max_concurrency())
+    return _request_slots
+
+
+# The rubric lives in the (unchanging) system prompt so the per-turn user
+# message is just a compact state line
+_SYSTEM_PROMPT = (
+    "You are an expert Texas Hold'em player. Each message is one JSON game state: "
+    "h=your hole cards, c=community cards (empty preflop), p=pot, cb=highest bet this round, "
+    "mb=your bet this round, ca=amount to call, ch=your chips, n=players at the table. "
+    "Cards are rank+suit, e.g. As=ace of spades, Td=ten of diamonds. "
+    "Reply with only JSON: {\"action\": \"fold\"|\"call\"|\"raise\", \"amount\": int}. "
+    "fold: amount 0. call: amount ca (0 means check). raise: amount greater than ca. "
+    "Raise with strong hands (pairs, ace high, suited connectors, strong draws) or to pressure weak opponents; "
+    "avoid reckless raises with weak hands. Prefer calling when marginal rather than surrendering the pot. "
+    "If you cannot fully call, prefer going all-in over folding when reasonable; fold when you should not pay."
+)
+# Shared by every request; keeping it byte-identical also lets providers reuse
+# their cached prefix for it
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
+
+# Prompt card codes like 'As' for every card, built once
+_CARD_CODES = {(rank, suit): f"{'??23456789TJQKA'[rank]}{suit}" for rank, suit in make_deck()}
+
+# Structured output: ask the endpoint to constrain decoding to the decision shape
+_DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": ["fold", "call", "raise"]},
+        "amount": {"type": "integer", "minimum": 0},
+    },
+    "required": ["action", "amount"],
+    "additionalProperties": False,
+}
+_DECISION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "poker_decision", "schema": _DECISION_SCHEMA, "strict": True},
+}
+
+# Enabled unless AI_STRUCTURED_OUTPUT=0; switched off for the process the
+# first time the endpoint rejects response_format
+_structured_output: Optional[bool] = None
+
+
+def _structured_output_enabled() -> bool:
+    global _structured_output
+    if _structured_output is None:
+        _structured_output = os.getenv('AI_STRUCTURED_OUTPUT', '1') != '0'
+    return _structured_output
+
+
+# Actions the model may choose, mapped to their canonical (interned) strings
+_VALID_ACTIONS = {'fold': 'fold', 'call': 'call', 'raise': 'raise'}
+
+# Highest share of the final pot worth paying with nothing but high card
+_HIGH_CARD_MAX_POT_ODDS = 0.25
+
+# Monte-Carlo showdown equity: rollouts per estimate, and the band in which
+# the spot is left to the model instead of being settled against pot odds
+_EQUITY_SAMPLES = 1000
+_EQUITY_RAISE = 0.6
+_EQUITY_WEAK = 0.4
+
+# Default for _simple_decision's strength argument: not evaluated yet
+_UNSET = object()
+
+# Recent model decisions keyed by PokerAI._decision_cache_key; values are
+# futures so concurrent identical lookups wait on one request
+_DECISION_CACHE_SIZE = 4096
+_decision_cache: "OrderedDict[Tuple, asyncio.Future]" = OrderedDict()
+
+
+def _bucket(value: int) -> int:
+    """Round a chip amount up to a power of two for cache keys."""
+    return 1 << value.bit_length() if value > 0 else 0
+
+
+def _last_int(text: str) -> Optional[int]:
+    """Last run of ASCII digits in text as an int, or None if there is none"""
+    end = len(text)
+    while end and not ('0' <= text[end - 1] <= '9'):
+        end -= 1
+    if not end:
+        return None
+    start = end - 1
+    while start and '0' <= text[start - 1] <= '9':
+        start -= 1
+    return int(text[start:end])
+
+
+class _JsonObjectScanner:
+    """Incrementally find the end of the first top-level JSON object in a stream.
+
+    Tracks brace depth and string/escape state across fed chunks so each
+    character is examined once; feed() returns the object text as soon as
+    its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+
+    def feed(self, text: str) -> Optional[str]:
+        start = 0
+        if not self._started:
+            start = text.find('{')
+            if start < 0:
+                return None
+            self._started = True
+        for i in range(start, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buf.append(text[start:i + 1])
+                    return ''.join(self._buf)
+        self._buf.append(text[start:])
+        return None
+
+
 class PokerAI:
     def __init__(self, player):
         self.player = player
         self.client = None
+        self.model = None
         self.thinking_callback = None  # Callback to notify when AI is thinking
         self._setup_client()
 
+    @property
+    def thinking_callback(self) -> Optional[Callable[[str, bool], Any]]:
+        return self._thinking_callback
+
+    @thinking_callback.setter
+    def thinking_callback(self, callback: Optional[Callable[[str, bool], Any]]) -> None:
+        # Resolve once whether the callback must be awaited, not on every decision
+        self._thinking_callback = callback if callable(callback) else None
+        self._thinking_is_async = asyncio.iscoroutinefunction(callback)
+
+    async def _notify_thinking(self, is_thinking: bool) -> None:
+        callback = self._thinking_callback
+        if callback is None:
+            return
+        try:
+            if self._thinking_is_async:
+                await callback(self.player.name, is_thinking)
+            else:
+                result = callback(self.player.name, is_thinking)
+                if asyncio.iscoroutine(result):
+                    await result
+        except Exception:
+            pass  # Don't let callback errors break the decision process
+
     def _setup_client(self):
         """Setup OpenAI client with custom endpoint"""
+        # Settings are read once per seat rather than on every request
+        self.model = os.getenv('AI_MODEL', 'llama-3.1-8b-instant')
         if not AsyncOpenAI:
             print("OpenAI package not installed, falling back to simple AI")
             return
@@ -43,11 +338,7 @@ class PokerAI:
             
         try:
             timeout = float(os.getenv('AI_TIMEOUT', '5'))  # Reduced from 30 to 5 seconds
-            self.client = AsyncOpenAI(
-                api_key=api_key,
-                base_url=base_url,
-                timeout=timeout
-            )
+            self.client = _get_shared_client(api_key, base_url, timeout)
             print(f"AI client configured with endpoint: {base_url}")
         except Exception as e:
             print(f"Failed to setup AI client: {e}, falling back to simple AI")
@@ -55,197 +346,231 @@ class PokerAI:
 
     async def test_connection(self) -> bool:
         """Test if the AI endpoint is accessible"""
+        global _connection_probe
         if not self.client:
             return False
-        
+
+        now = time.monotonic()
+        if _connection_probe is not None:
+            client, checked_at, ok = _connection_probe
+            if client is self.client and now - checked_at < _CONNECTION_PROBE_TTL:
+                return ok
+
         try:
-            # Simple test request
-            response = await self.client.chat.completions.create(
-                model=os.getenv('AI_MODEL', 'llama-3.1-8b-instant'),
-                messages=[{"role": "user", "content": "Hello"}],
-                max_tokens=5
-            )
+            # Listing models is a cheap metadata call; no tokens are generated
+            await self.client.models.list()
+            _connection_probe = (self.client, now, True)
             return True
         except Exception as e:
-            error_msg = str(e)
-            if "cloudflare" in error_msg.lower() or "blocked" in error_msg.lower():
+            _connection_probe = (self.client, now, False)
+            kind = _classify_api_error(e)
+            if kind == 'blocked':
                 print("🛡️  AI endpoint is blocked by Cloudflare")
-            elif "timeout" in error_msg.lower():
+            elif kind == 'timeout':
                 print("⏱️  AI endpoint timed out")
-            elif "connection" in error_msg.lower():
+            elif kind == 'connection':
                 print("🔌 Cannot connect to AI endpoint")
             else:
-                print(f"❌ AI test failed: {error_msg[:100]}...")
+                print(f"❌ AI test failed: {str(e)[:100]}...")
             return False
 
     async def decide_action(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
         """Make a poker decision using AI or fallback to simple logic"""
         # Notify that AI is starting to think
-        if self.thinking_callback and callable(self.thinking_callback):
-            try:
-                result = self.thinking_callback(self.player.name, True)
-                if asyncio.iscoroutine(result):
-                    await result
-            except Exception:
-                pass  # Don't let callback errors break the decision process
-        
+        await self._notify_thinking(True)
+
         try:
+            # Clear-cut spots don't need a model round-trip. The equity
+            # rollouts are CPU-bound, so they run in a worker thread instead
+            # of stalling every other session on the event loop
+            strength = None
+            if len(game_state.get('community', [])) >= 3:
+                strength = await asyncio.to_thread(self._strength_decision, game_state)
+            if strength is not None:
+                return strength
+
             if self.client:
                 try:
-                    return await self._ai_decision(game_state)
+                    return await self._ai_decision(game_state, strength)
                 except Exception as e:
                     print(f"AI decision failed: {e}, using fallback")
             
-            return await self._simple_decision(game_state)
+            return self._simple_decision(game_state, strength)
         finally:
             # Notify that AI is done thinking
-            if self.thinking_callback and callable(self.thinking_callback):
-                try:
-                    result = self.thinking_callback(self.player.name, False)
-                    if asyncio.iscoroutine(result):
-                        await result
-                except Exception:
-                    pass  # Don't let callback errors break the decision process
+            await self._notify_thinking(False)
 
-    async def _ai_decision(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Use AI to make poker decision"""
+    async def _ai_decision(self, game_state: Dict[str, Any], strength: Any = _UNSET) -> Dict[str, Any]:
+        """Use AI to make poker decision; strength is passed on to any fallback"""
         if not self.client:
-            return await self._simple_decision(game_state)
-            
+            return self._simple_decision(game_state, strength)
+
+        # Identical situations reuse the model's earlier answer, and identical
+        # requests that are already in flight share that single call
+        cache_key = self._decision_cache_key(game_state)
+        pending = _decision_cache.get(cache_key)
+        if pending is not None:
+            _decision_cache.move_to_end(cache_key)
+            decision = await asyncio.shield(pending)
+            if decision is None:
+                return self._simple_decision(game_state, strength)
+            return self._validate_decision(decision, game_state)
+
+        pending = asyncio.get_running_loop().create_future()
+        _decision_cache[cache_key] = pending
+        if len(_decision_cache) > _DECISION_CACHE_SIZE:
+            _decision_cache.popitem(last=False)
+        decision = None
+
         # Prepare the game state for the AI
         prompt = self._create_poker_prompt(game_state)
         
-        # Add a small delay to simulate thinking
-        await asyncio.sleep(random.uniform(0.2, 0.6))
-        
         try:
-            model = os.getenv('AI_MODEL', 'llama-3.1-8b-instant')
-            response = await self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert poker player. Analyze the game state and make the best decision. Respond with valid JSON containing 'action' (fold/call/raise) and 'amount' (0 for fold/call, positive for raise)."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=150,
-                temperature=0.7
-            )
-            
-            # Parse the AI response
-            content = response.choices[0].message.content
-            
+            messages = [_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+            async with _get_request_slots():
+                stream = await self._open_decision_stream(messages)
+                content, json_str = await self._read_decision_stream(stream)
+
             # DEBUG: Log the raw AI response
             logging.debug(f"🤖 DEBUG [{self.player.name}] Raw AI response: {repr(content)}")
             
             if not content:
                 print("AI returned empty response, using fallback")
-                return await self._simple_decision(game_state)
-                
-            content = content.strip()
-            
-            # Try to extract JSON from the response
-            try:
-                # Look for JSON in the response
-                if '{' in content and '}' in content:
-                    start = content.find('{')
-                    end = content.rfind('}') + 1
-                    json_str = content[start:end]
-                    decision = json.loads(json_str)
-                else:
-                    # Fallback: parse text response
-                    decision = self._parse_text_decision(content)
+                return self._simple_decision(game_state, strength)
                 
-                # Validate and sanitize the decision
-                validated_decision = self._validate_decision(decision, game_state)
-                logging.debug(f"🤖 DEBUG [{self.player.name}] Final decision: {validated_decision}")
-                return validated_decision
-                
-            except (json.JSONDecodeError, KeyError):
-                # If JSON parsing fails, try to interpret the text
-                return self._parse_text_decision(content, game_state)
+            decision = self._parse_decision(content.strip(), json_str)
+
+            # Validate and sanitize the decision
+            validated_decision = self._validate_decision(decision, game_state)
+            logging.debug(f"🤖 DEBUG [{self.player.name}] Final decision: {validated_decision}")
+            return validated_decision
                 
         except Exception as e:
-            error_msg = str(e)
-            
-            # Detect Cloudflare blocks
-            if "cloudflare" in error_msg.lower() or "blocked" in error_msg.lower() or "<!DOCTYPE html>" in error_msg:
+            kind = _classify_api_error(e)
+            if kind == 'blocked':
                 print(f"🛡️  AI endpoint blocked by Cloudflare. Using smart fallback AI.")
                 print("   💡 Tip: Consider using a different AI endpoint or direct OpenAI API.")
-            elif "timeout" in error_msg.lower():
+            elif kind == 'timeout':
                 print(f"⏱️  AI request timed out. Using fallback AI.")
-            elif "connection" in error_msg.lower():
+            elif kind == 'connection':
                 print(f"🔌 AI connection failed. Using fallback AI.")
             else:
-                print(f"❌ AI API call failed: {error_msg[:100]}...")
+                print(f"❌ AI API call failed: {str(e)[:100]}...")
             
-            return await self._simple_decision(game_state)
+            return self._simple_decision(game_state, strength)
+
+        finally:
+            # Publish the outcome to anyone waiting on this key; failures are
+            # not cached so the next identical situation asks the model again
+            if decision is None and _decision_cache.get(cache_key) is pending:
+                del _decision_cache[cache_key]
+            pending.set_result(decision)
+
+    def _decision_cache_key(self, game_state: Dict[str, Any]) -> Tuple:
+        """Canonical key for decision caching: exact cards and bets, bucketed pot and stack"""
+        community = game_state.get('community', [])
+        current_bet, my_bet, _ = _betting_context(game_state, self.player.name)
+        return (
+            tuple(sorted(self.player.hand)),
+            tuple(sorted(community)),
+            current_bet,
+            my_bet,
+            _bucket(game_state.get('pot', 0)),
+            _bucket(self.player.chips),
+            len(game_state.get('players', [])),
+        )
+
+    def _parse_decision(self, content: str, json_str: Optional[str]) -> Dict[str, Any]:
+        """Turn the model's reply into a raw {'action', 'amount'} decision"""
+        try:
+            if json_str is not None:
+                # The stream was cut as soon as the decision object closed
+                return _json_loads(json_str)
+            if '{' in content and '}' in content:
+                # Look for JSON in the response
+                start = content.find('{')
+                end = content.rfind('}') + 1
+                return _json_loads(content[start:end])
+        except ValueError:
+            # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
+            pass
+        # Fallback: parse text response
+        return self._parse_text_decision(content)
+
+    async def _open_decision_stream(self, messages):
+        """Start a streamed completion, using a JSON schema when the endpoint accepts one."""
+        global _structured_output
+        if _structured_output_enabled():
+            try:
+                # The schema forbids prose, so the reply fits in a few tokens
+                return await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=40,
+                    temperature=0.7,
+                    stream=True,
+                    response_format=_DECISION_RESPONSE_FORMAT
+                )
+            except BadRequestError as e:
+                logging.info(f"AI endpoint rejected structured output, using plain JSON prompts: {e}")
+                _structured_output = False
+
+        return await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=150,
+            temperature=0.7,
+            stream=True
+        )
+
+    async def _read_decision_stream(self, stream) -> Tuple[str, Optional[str]]:
+        """Collect streamed completion text, stopping once a JSON object is complete.
+
+        Returns (text received so far, JSON object text or None). Closing the
+        stream early stops the server from decoding tokens we would discard.
+        """
+        scanner = _JsonObjectScanner()
+        parts: List[str] = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                json_str = scanner.feed(delta)
+                if json_str is not None:
+                    return ''.join(parts), json_str
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception:
+                    pass
+        return ''.join(parts), None
 
     def _create_poker_prompt(self, game_state: Dict[str, Any]) -> str:
-        """Create a detailed prompt for the AI"""
+        """Create a compact state line for the AI (keys are explained in the system prompt)"""
         community = game_state.get('community', [])
-        bets = game_state.get('bets', {})
-        pot = game_state.get('pot', 0)
-        players = game_state.get('players', [])
-        
-        # Format cards nicely
-        hand_str = self._format_cards(self.player.hand)
-        community_str = self._format_cards(community) if community else "None"
-        
-        # Calculate betting info
-        current_bet = max(bets.values()) if bets else 0
-        my_bet = bets.get(self.player.name, 0)
-        call_amount = max(current_bet - my_bet, 0)
-
-        prompt = f"""
-    POKER GAME STATE:
-    - Your hand: {hand_str}
-    - Community cards: {community_str}
-    - Your chips: {self.player.chips}
-    - Pot size: {pot}
-    - Current highest bet: {current_bet}
-    - Your current bet: {my_bet}
-    - Amount to call: {call_amount}
-    - Number of players: {len(players)}
-
-    BETTING ROUND: {"Preflop" if not community else f"Post-flop ({len(community)} cards)"}
-
-    Important rules:
-    - If you cannot fully call but can go all-in with your remaining chips, prefer going all-in instead of folding when reasonable.
-    - FOLD when you truly cannot or should not pay the call.
-
-    Options (reply using the JSON at the end):
-    1. FOLD - Give up your hand (amount: 0)
-    2. CALL - Match the current bet (amount: {call_amount})
-    3. RAISE - Increase the bet (amount: more than {call_amount})
-
-    Guidance:
-    - Consider raising with strong hands (pairs, Ace high, suited connectors, strong draws), or to apply pressure and steal pots when opponents seem weak. Avoid reckless raises with weak hands.
-    - Prefer calling when marginal; avoid unnecessary folds that surrender the pot when you could at least contest it.
-
-    Respond with JSON: {{"action": "fold/call/raise", "amount": number}}
-    """
-        return prompt
+        current_bet, my_bet, call_amount = _betting_context(game_state, self.player.name)
+
+        state = {
+            "h": self._format_cards(self.player.hand),
+            "c": self._format_cards(community),
+            "p": game_state.get('pot', 0),
+            "cb": current_bet,
+            "mb": my_bet,
+            "ca": call_amount,
+            "ch": self.player.chips,
+            "n": len(game_state.get('players', [])),
+        }
+        return _json_dumps(state)
 
     def _format_cards(self, cards) -> str:
-        """Format cards for display"""
-        if not cards:
-            return "None"
-        
-        suits = {'s': '♠', 'h': '♥', 'd': '♦', 'c': '♣'}
-        ranks = {11: 'J', 12: 'Q', 13: 'K', 14: 'A'}
-        
-        formatted = []
-        for rank, suit in cards:
-            rank_str = ranks.get(rank, str(rank))
-            suit_str = suits.get(suit, suit)
-            formatted.append(f"{rank_str}{suit_str}")
-        
-        return ", ".join(formatted)
+        """Format cards as space-separated 2-character codes like 'As Td'"""
+        return " ".join([_CARD_CODES[card] for card in cards])
 
     def _parse_text_decision(self, content: str, game_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Parse text response to extract decision"""
@@ -255,10 +580,8 @@ class PokerAI:
             return {'action': 'fold', 'amount': 0}
         elif 'raise' in content_lower:
             # Try to extract raise amount
-            import re
-            numbers = re.findall(r'\d+', content)
-            if numbers:
-                amount = int(numbers[-1])  # Take the last number found
+            amount = _last_int(content)
+            if amount is not None:
                 return {'action': 'raise', 'amount': amount}
             else:
                 # Default small raise
@@ -269,13 +592,12 @@ class PokerAI:
 
     def _validate_decision(self, decision: Dict[str, Any], game_state: Dict[str, Any]) -> Dict[str, Any]:
         """Use AI's decision directly, only apply basic sanity checks."""
-        action = str(decision.get('action', 'fold')).lower()
+        # Only allow valid actions; the lookup also swaps the parsed string for
+        # the interned literal, so the betting engine's comparisons hit the
+        # identity fast path
+        action = _VALID_ACTIONS.get(str(decision.get('action', 'fold')).lower(), 'fold')
         amount = int(decision.get('amount', 0))
 
-        # Only allow valid actions
-        if action not in ['fold', 'call', 'raise']:
-            action = 'fold'
-
         # Chips sanity check
         chips = self.player.chips
         if amount < 0:
@@ -285,42 +607,70 @@ class PokerAI:
 
         return {'action': action, 'amount': amount}
 
-    async def _simple_decision(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Fallback simple AI logic with realistic thinking time"""
-        # Shorter, more human-like thinking delay
+    def _strength_decision(self, game_state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Decide clear-cut postflop spots from the made hand; None for judgement calls"""
         community = game_state.get('community', [])
-        bets = game_state.get('bets', {})
-        pot = game_state.get('pot', 0)
-        
-        # Calculate thinking time based on complexity (shorter than before)
-        base_delay = 0.5  # Reduced from 1.0
-        
-        # More community cards = slightly more thinking
-        if community:
-            base_delay += len(community) * 0.1  # Reduced from 0.3
-        
-        # Bigger pot = a bit more consideration
-        if pot > 100:
-            base_delay += 0.2  # Reduced from 0.5
-        
-        # If there's betting action, think a bit longer
-        if bets and max(bets.values()) > 0:
-            base_delay += 0.2  # Reduced from 0.4
-        
-        # Add some randomness to make it feel natural
-        thinking_delay = random.uniform(base_delay * 0.8, base_delay * 1.2)
-        thinking_delay = min(thinking_delay, 2.5)  # Cap at 2.5 seconds instead of 4
-        
-        await asyncio.sleep(thinking_delay)
-        
-        # game_state contains 'community', 'pot', 'bets', 'players'
+        if len(community) < 3:
+            return None
+
+        _, _, call_amount = _betting_context(game_state, self.player.name)
         chips = self.player.chips
-        
-        # Calculate how much we need to call
-        current_bet = max(bets.values()) if bets else 0
-        my_bet = bets.get(self.player.name, 0)
-        call_amount = max(current_bet - my_bet, 0)
-        
+        category, _ = best_hand_from_seven(self.player.hand + community)
+
+        if category >= HAND_RANKS['straight']:
+            # Straight or better: always build the pot
+            decision = {'action': 'raise', 'amount': min(call_amount + 40, chips)}
+            logging.debug(f"🤖 DEBUG [{self.player.name}] Strength decision (monster - RAISE): {decision}")
+            return decision
+
+        if category == HAND_RANKS['highcard'] and call_amount > 0:
+            # Nothing made: only continue when the price is cheap
+            pot_odds = call_amount / (game_state.get('pot', 0) + call_amount)
+            if pot_odds > _HIGH_CARD_MAX_POT_ODDS:
+                decision = {'action': 'fold', 'amount': 0}
+                logging.debug(f"🤖 DEBUG [{self.player.name}] Strength decision (high card, pot odds {pot_odds:.2f}): {decision}")
+                return decision
+
+        # Everything else: weigh simulated showdown equity against the price.
+        # Seed from the decision-cache key so the same spot always plays the same
+        opponents = sum(
+            1 for p in game_state.get('players', [])
+            if p[0] != self.player.name and p[2] in ('active', 'all-in')
+        )
+        rng = random.Random(repr(self._decision_cache_key(game_state)))
+        equity = estimate_equity(self.player.hand, community, max(opponents, 1), _EQUITY_SAMPLES, rng)
+
+        if equity >= _EQUITY_RAISE:
+            decision = {'action': 'raise', 'amount': min(call_amount + 25, chips)}
+        elif equity < _EQUITY_WEAK:
+            pot_odds = call_amount / (game_state.get('pot', 0) + call_amount) if call_amount else 0.0
+            if call_amount == 0 or equity >= pot_odds:
+                decision = {'action': 'call', 'amount': call_amount}
+            else:
+                decision = {'action': 'fold', 'amount': 0}
+        else:
+            return None
+        logging.debug(f"🤖 DEBUG [{self.player.name}] Strength decision (equity {equity:.2f}): {decision}")
+        return decision
+
+    def _hand_mask(self) -> int:
+        """Rank bitmask of the hole cards, as cached on the player at deal time"""
+        hand_mask = self.player.hand_mask
+        if not hand_mask:
+            for rank, _ in self.player.hand:
+                hand_mask |= 1 << rank
+        return hand_mask
+
+    def _simple_decision(self, game_state: Dict[str, Any], strength: Any = _UNSET) -> Dict[str, Any]:
+        """Fallback simple AI logic
+
+        strength is a _strength_decision() result already computed for this
+        state; it is only evaluated here when the caller hasn't.
+        """
+        community = game_state.get('community', [])
+        _, _, call_amount = _betting_context(game_state, self.player.name)
+        chips = self.player.chips
+
         # If nobody has bet (everyone checked), prefer to check rather than folding.
         # Returning a 'call' with amount 0 represents a check in this codebase.
         if call_amount == 0:
@@ -334,33 +684,31 @@ class PokerAI:
             logging.debug(f"🤖 DEBUG [{self.player.name}] Simple AI decision (broke): {decision}")
             return decision
 
+        if strength is _UNSET:
+            strength = self._strength_decision(game_state)
+        if strength is not None:
+            return strength
+
         # Very naive rules - now more aggressive!
         if not community:
-            # preflop
-            ranks = sorted([c[0] for c in self.player.hand], reverse=True)
-            # pocket pair or high cards -> RAISE!
-            if ranks[0] == ranks[1]:  # pocket pair
-                raise_amount = call_amount + 20
-                decision = {'action': 'raise', 'amount': min(raise_amount, chips)}
-                logging.debug(f"🤖 DEBUG [{self.player.name}] Simple AI decision (preflop pair - RAISE): {decision}")
-                return decision
-            elif ranks[0] >= 12 or ranks[1] >= 12:  # face card
-                raise_amount = call_amount + 15
-                decision = {'action': 'raise', 'amount': min(raise_amount, chips)}
-                logging.debug(f"🤖 DEBUG [{self.player.name}] Simple AI decision (preflop high card - RAISE): {decision}")
-                return decision
-            elif ranks[0] >= 11 or ranks[1] >= 11:  # jack or better
+            # preflop: pocket pair or high cards -> RAISE!
+            r1 = self.player.hand[0][0]
+            r2 = self.player.hand[1][0]
+            action, raise_extra, reason = _PREFLOP_TABLE[(r1, r2) if r1 <= r2 else (r2, r1)]
+            if action == 'raise':
+                decision = {'action': 'raise', 'amount': min(call_amount + raise_extra, chips)}
+            elif action == 'call':
                 decision = {'action': 'call', 'amount': call_amount}
-                logging.debug(f"🤖 DEBUG [{self.player.name}] Simple AI decision (preflop decent hand): {decision}")
-                return decision
-            decision = {'action': 'fold', 'amount': 0}
-            logging.debug(f"🤖 DEBUG [{self.player.name}] Simple AI decision (preflop bad hand): {decision}")
+            else:
+                decision = {'action': 'fold', 'amount': 0}
+            logging.debug(f"🤖 DEBUG [{self.player.name}] Simple AI decision ({reason}): {decision}")
             return decision
 
         # Postflop: if we have any pair with community, RAISE!
-        my_ranks = [c[0] for c in self.player.hand]
-        comm_ranks = [c[0] for c in community]
-        if any(r in comm_ranks for r in my_ranks):
+        comm_mask = 0
+        for rank, _ in community:
+            comm_mask |= 1 << rank
+        if comm_mask & self._hand_mask():
             # We paired - let's raise!
             raise_amount = call_amount + 25
             decision = {'action': 'raise', 'amount': min(raise_amount, chips)}
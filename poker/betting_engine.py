@@ -4,12 +4,7 @@ Extracted from game.py to modularize the codebase.
 """
 
 import logging
-from typing import List, Any
-
-
-def is_already_bet(amt: int, player_current_bet: int) -> bool:
-    """Check if the player is trying to bet the same amount they already bet."""
-    return amt == player_current_bet
+from typing import Any, List, Set
 
 
 class BettingEngine:
@@ -18,11 +13,52 @@ class BettingEngine:
     def __init__(self, game_engine, player_manager=None):
         self.game_engine = game_engine
         self.player_manager = player_manager
+        # Human players whose chips changed since the last wallet sync
+        self._unsynced_wallets: Set[str] = set()
     
     def _sync_wallet_balance(self, player):
-        """Sync a human player's wallet balance with their current chips."""
+        """Mark a human player's wallet for syncing with their current chips."""
         if self.player_manager and not player.is_ai:
-            self.player_manager.sync_wallet_balance(player.name)
+            self._unsynced_wallets.add(player.name)
+
+    def _flush_wallet_syncs(self):
+        """Sync every wallet marked since the last flush, once per player."""
+        names, self._unsynced_wallets = self._unsynced_wallets, set()
+        for name in names:
+            self.player_manager.sync_wallet_balance(name)
+
+    def _apply_contribution(self, player, amount: int) -> int:
+        """Move up to `amount` of the player's chips into the pot; return what was paid."""
+        pay = amount if amount < player.chips else player.chips
+        player.chips -= pay
+        self._sync_wallet_balance(player)  # Sync wallet once the round is over
+        game_engine = self.game_engine
+        game_engine.bets[player.name] += pay
+        game_engine.round_bets[player.name] += pay
+        game_engine.pot += pay
+        return pay
+
+    def _do_call(self, player, call_amount: int, reason: str = '') -> int:
+        """Call `call_amount` (checking when it is 0) and log it; return what was paid.
+
+        Every call-equivalent outcome goes through here, so short stacks are
+        always put all-in and logged the same way. `reason` is appended to the
+        history entry in parentheses.
+        """
+        history = self.game_engine.action_history
+        suffix = f" ({reason})" if reason else ""
+        if call_amount <= 0:
+            history.append(f"{player.name} checked{suffix}")
+            return 0
+        pay = self._apply_contribution(player, call_amount)
+        if pay < call_amount:
+            # Player went all-in but couldn't cover the full call
+            history.append(f"{player.name} called ${pay} (all-in)")
+        else:
+            history.append(f"{player.name} called ${call_amount}{suffix}")
+        if player.chips == 0:
+            player.state = 'all-in'
+        return pay
     
     async def betting_round(self, allow_checks: bool = True, min_bet: int = 0):
         """Proper poker betting round: continue until all active players have called or folded.
@@ -34,54 +70,78 @@ class BettingEngine:
                       has been made in the round (useful for pre-flop behavior
                       if you want to force at least a small blind/ante-like bet).
         min_bet: the minimum bet amount to enforce when current bet is 0.
+
+        Wallets of human players whose chips changed are synced once when the
+        round ends (or is aborted), not after every contribution.
         """
-        
+        try:
+            await self._betting_round(allow_checks, min_bet)
+        finally:
+            self._flush_wallet_syncs()
+
+    async def _betting_round(self, allow_checks: bool, min_bet: int):
+        """Run one betting round; see betting_round."""
         # Reset round bets at the start of each betting round
-        self.game_engine.reset_round_bets()
+        game_engine = self.game_engine
+        game_engine.reset_round_bets()
+
+        # The loop below is the hot path of every hand: bind the engine's
+        # containers once (none of them is replaced until the next reset)
+        round_bets = game_engine.round_bets
+        history = game_engine.action_history
+        # The board doesn't change mid-round, so each action's state is only
+        # the per-turn fields layered over this
+        public_base = game_engine.get_public_state_base()
         
-        # Get list of active players who can act
-        active_players = [p for p in self.game_engine.players if p.state == 'active']
-        if len(active_players) <= 1:
+        # Players who can act this round, in seat order, with their seat bit
+        # (bit i is game_engine.players[i]). Nobody becomes active again
+        # mid-round, so this list is built once and players who drop out are
+        # simply skipped, with active_count tracking how many remain
+        seats = [(1 << seat, p) for seat, p in enumerate(game_engine.players) if p.state == 'active']
+        if len(seats) <= 1:
             return  # No betting with 0 or 1 active players
-            
-        # Track which players have acted in this round and if betting action occurred
-        players_to_act = set(p.name for p in active_players)
-        
-        while len(players_to_act) > 0:
+        active_count = len(seats)
+
+        # Players still to act this round, as a bitmask over seat positions.
+        # A bit is only ever set for a player who is still active
+        players_to_act = 0
+        for seat_bit, _ in seats:
+            players_to_act |= seat_bit
+
+        while players_to_act:
             # Check if we still have enough active players to continue
-            current_active = [p for p in self.game_engine.players if p.state == 'active']
-            if len(current_active) <= 1:
+            if active_count <= 1:
                 break
-                
-            for p in current_active[:]:  # Copy list since we might modify player states
-                if p.name not in players_to_act:
+
+            for seat_bit, p in seats:
+                if not players_to_act & seat_bit:
                     continue
                     
                 # Check if player has no chips
                 if p.chips <= 0:
-                    # Treat p.max_rebuys == None as unlimited. If Player doesn't have
-                    # a max_rebuys attribute, default to unlimited (None).
-                    max_rebuys = getattr(p, 'max_rebuys', None)
+                    # Treat p.max_rebuys == None as unlimited.
+                    max_rebuys = p.max_rebuys
                     # Allow rebuy when max_rebuys is None (unlimited) or when
                     # p.rebuys is less than the configured limit.
                     if max_rebuys is None or p.rebuys < max_rebuys:
                         p.chips = 50  # Small rebuy amount
                         p.rebuys += 1
                         max_display = '∞' if max_rebuys is None else str(max_rebuys)
-                        self.game_engine.action_history.append(f"{p.name} received $50 rebuy (was broke, {p.rebuys}/{max_display})")
+                        history.append(f"{p.name} received $50 rebuy (was broke, {p.rebuys}/{max_display})")
                     else:
                         p.state = 'eliminated'
-                        self.game_engine.action_history.append(f"{p.name} eliminated (no rebuys left)")
-                        players_to_act.discard(p.name)
+                        history.append(f"{p.name} eliminated (no rebuys left)")
+                        players_to_act &= ~seat_bit
+                        active_count -= 1
                         continue
                 
-                # Calculate current bet for this betting round only
-                current_bet = max(self.game_engine.round_bets.values()) if self.game_engine.round_bets else 0
-                player_current_bet = self.game_engine.round_bets[p.name]
+                # Current bet for this betting round only
+                current_bet = game_engine.current_bet
+                player_current_bet = round_bets[p.name]
                 
                 try:
                     # Pass the current game state to the player with current player info
-                    act = await p.take_action(self.game_engine.get_public_state(current_player_name=p.name))
+                    act = await p.take_action(game_engine.get_public_state_for(p.name, public_base))
                 except NotImplementedError:
                     # default to call/check
                     if current_bet > player_current_bet:
@@ -91,42 +151,29 @@ class BettingEngine:
                 except (AttributeError, ValueError, TypeError, KeyError):
                     # on any actor error, fold the player
                     p.state = 'folded'
-                    self.game_engine.action_history.append(f"{p.name} folded (connection error)")
-                    players_to_act.discard(p.name)
+                    history.append(f"{p.name} folded (connection error)")
+                    players_to_act &= ~seat_bit
+                    active_count -= 1
                     continue
 
                 a = act.get('action')
-                amt = int(act.get('amount', 0))
+                # Actors almost always hand back an int already
+                amt = act.get('amount', 0)
+                if amt.__class__ is not int:
+                    amt = int(amt)
 
                 logging.debug("Player %s action: %s, amount: %s", p.name, a, amt)
                 
                 # Remove player from players_to_act - they've now acted
-                players_to_act.discard(p.name)
+                players_to_act &= ~seat_bit
                 
                 if a == 'fold':
                     p.state = 'folded'
-                    self.game_engine.action_history.append(f"{p.name} folded")
+                    history.append(f"{p.name} folded")
                     
                 elif a == 'call':
-                    # Call the current bet
-                    call_amount = max(current_bet - player_current_bet, 0)
-                    pay = min(call_amount, p.chips)
-                    p.chips -= pay
-                    self._sync_wallet_balance(p)  # Sync wallet after chip change
-                    self.game_engine.bets[p.name] += pay
-                    self.game_engine.round_bets[p.name] += pay
-                    self.game_engine.pot += pay
-                    
-                    if p.chips == 0 and pay < call_amount:
-                        # Player went all-in but couldn't cover the full call
-                        p.state = 'all-in'
-                        self.game_engine.action_history.append(f"{p.name} called ${pay} (all-in)")
-                    elif call_amount > 0:
-                        self.game_engine.action_history.append(f"{p.name} called ${call_amount}")
-                        if p.chips == 0:
-                            p.state = 'all-in'
-                    else:
-                        self.game_engine.action_history.append(f"{p.name} checked")
+                    # Call the current bet (a check when nothing is owed)
+                    self._do_call(p, current_bet - player_current_bet)
                         
                 elif a == 'check':
                     # Checks may be disallowed (pre-flop) or only allowed when
@@ -134,54 +181,32 @@ class BettingEngine:
                     if current_bet > player_current_bet:
                         # Can't check when there's a bet to call - this should be caught at input level
                         # For safety, convert to a call
-                        call_amount = current_bet - player_current_bet
-                        pay = min(call_amount, p.chips)
-                        p.chips -= pay
-                        self._sync_wallet_balance(p)  # Sync wallet after chip change
-                        self.game_engine.bets[p.name] += pay
-                        self.game_engine.round_bets[p.name] += pay
-                        self.game_engine.pot += pay
-                        self.game_engine.action_history.append(f"{p.name} called ${call_amount} (check converted to call)")
-                        if p.chips == 0:
-                            p.state = 'all-in'
+                        self._do_call(p, current_bet - player_current_bet, "check converted to call")
                     else:
                         if not allow_checks:
                             # Convert invalid check to minimum bet instead of folding
                             if min_bet > 0:
                                 bet_amount = min_bet - player_current_bet
-                                pay = min(bet_amount, p.chips)
-                                p.chips -= pay
-                                self._sync_wallet_balance(p)  # Sync wallet after chip change
-                                self.game_engine.bets[p.name] += pay
-                                self.game_engine.round_bets[p.name] += pay
-                                self.game_engine.pot += pay
-                                self.game_engine.action_history.append(f"{p.name} bet ${min_bet} (check converted to min bet)")
+                                self._apply_contribution(p, bet_amount)
+                                history.append(f"{p.name} bet ${min_bet} (check converted to min bet)")
                                 if p.chips == 0:
                                     p.state = 'all-in'
                                 # This is a new bet - all other active players need to act
-                                players_to_act = set(player.name for player in self.game_engine.players 
-                                                   if player.state == 'active' and player.name != p.name)
+                                for other_bit, other in seats:
+                                    if other is not p and other.state == 'active':
+                                        players_to_act |= other_bit
                             else:
                                 # No min bet specified, force fold but this should be rare
                                 p.state = 'folded'
-                                self.game_engine.action_history.append(f"{p.name} folded (checks not allowed this round)")
+                                history.append(f"{p.name} folded (checks not allowed this round)")
                         else:
-                            self.game_engine.action_history.append(f"{p.name} checked")
+                            history.append(f"{p.name} checked")
                         
                 elif a in ('bet', 'raise'):
                     # Bet the specified amount (must be positive)
                     if amt <= 0:
                         # Invalid bet amount, treat as check/call
-                        if current_bet > player_current_bet:
-                            call_amount = current_bet - player_current_bet
-                            pay = min(call_amount, p.chips)
-                            p.chips -= pay
-                            self.game_engine.bets[p.name] += pay
-                            self.game_engine.round_bets[p.name] += pay
-                            self.game_engine.pot += pay
-                            self.game_engine.action_history.append(f"{p.name} called ${call_amount} (invalid bet)")
-                        else:
-                            self.game_engine.action_history.append(f"{p.name} checked (invalid bet)")
+                        self._do_call(p, current_bet - player_current_bet, "invalid bet")
                     else:
                         # Valid bet amount - determine if it's a valid raise
                         if current_bet == 0:
@@ -191,62 +216,52 @@ class BettingEngine:
                                 # Treat as invalid/too small bet -> check/fold depending
                                 if not allow_checks:
                                     p.state = 'folded'
-                                    self.game_engine.action_history.append(f"{p.name} folded (bet ${amt} < min ${min_bet})")
+                                    history.append(f"{p.name} folded (bet ${amt} < min ${min_bet})")
+                                    active_count -= 1
                                     continue
                                 else:
-                                    self.game_engine.action_history.append(f"{p.name} checked (bet ${amt} < min ${min_bet})")
+                                    history.append(f"{p.name} checked (bet ${amt} < min ${min_bet})")
                                     continue
                             bet_amount = amt - player_current_bet
-                            pay = min(bet_amount, p.chips)
-                            p.chips -= pay
-                            self._sync_wallet_balance(p)  # Sync wallet after chip change
-                            self.game_engine.bets[p.name] += pay
-                            self.game_engine.round_bets[p.name] += pay
-                            self.game_engine.pot += pay
+                            self._apply_contribution(p, bet_amount)
                             action_msg = f"{p.name} bet ${amt}"
-                            self.game_engine.action_history.append(action_msg)
+                            history.append(action_msg)
                             if p.chips == 0:
                                 p.state = 'all-in'
                             # This is a new bet - all other active players need to act
-                            players_to_act = set(player.name for player in self.game_engine.players 
-                                               if player.state == 'active' and player.name != p.name)
-                        elif is_already_bet(amt, player_current_bet):
-                            # Player is trying to bet the same amount they already bet - treat as check
-                            self.game_engine.action_history.append(f"{p.name} checked (already at ${amt})")
+                            for other_bit, other in seats:
+                                if other is not p and other.state == 'active':
+                                    players_to_act |= other_bit
                         elif amt <= current_bet:
-                            # Bet amount is not enough to raise
-                            call_amount = max(current_bet - player_current_bet, 0)
-                            pay = min(call_amount, p.chips)
-                            p.chips -= pay
-                            self._sync_wallet_balance(p)  # Sync wallet after chip change
-                            self.game_engine.bets[p.name] += pay
-                            self.game_engine.round_bets[p.name] += pay
-                            self.game_engine.pot += pay
-                            if call_amount > 0:
-                                self.game_engine.action_history.append(f"{p.name} called ${call_amount} (amount ${amt} insufficient for raise)")
+                            # Bet amount is not enough to raise: call whatever
+                            # is still owed, or check if the player is already in
+                            call_amount = current_bet - player_current_bet
+                            if call_amount == 0 and amt == current_bet:
+                                reason = f"already at ${amt}"
                             else:
-                                # Player tried to bet the same amount they already bet - treat as check
-                                if amt == current_bet and player_current_bet == current_bet:
-                                    self.game_engine.action_history.append(f"{p.name} checked (already at ${amt})")
-                                else:
-                                    self.game_engine.action_history.append(f"{p.name} checked (amount ${amt} insufficient for raise)")
+                                reason = f"amount ${amt} insufficient for raise"
+                            self._do_call(p, call_amount, reason)
                         else:
                             # Valid raise - amt is higher than current bet (this is a "raise")
                             bet_amount = amt - player_current_bet
-                            pay = min(bet_amount, p.chips)
-                            p.chips -= pay
-                            self._sync_wallet_balance(p)  # Sync wallet after chip change
-                            self.game_engine.bets[p.name] += pay
-                            self.game_engine.round_bets[p.name] += pay
-                            self.game_engine.pot += pay
+                            self._apply_contribution(p, bet_amount)
                             action_msg = f"{p.name} raised to ${amt}"
-                            self.game_engine.action_history.append(action_msg)
+                            history.append(action_msg)
                             if p.chips == 0:
                                 p.state = 'all-in'
                             # This is a raise - all other active players need to act again
-                            players_to_act = set(player.name for player in self.game_engine.players 
-                                               if player.state == 'active' and player.name != p.name)
-                
+                            for other_bit, other in seats:
+                                if other is not p and other.state == 'active':
+                                    players_to_act |= other_bit
+
+                # Folding or going all-in takes the player out of the action
+                if p.state != 'active':
+                    active_count -= 1
+
+                # Whatever the action, only this player's round bet can have grown
+                if round_bets[p.name] > game_engine.current_bet:
+                    game_engine.current_bet = round_bets[p.name]
+
                 # Break inner loop if no more players to act in this round
-                if len(players_to_act) == 0:
+                if not players_to_act:
                     break
\ No newline at end of file
@@ -5,44 +5,340 @@ Handles persistent storage of wallets, player data, and action history.
 Uses SQLite for simplicity and reliability.
 """
 
+import hashlib
 import sqlite3
 import logging
+import queue
+import re
 import time
 import json
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 from contextlib import contextmanager
 import threading
 
+# Probes are stored as JSON bytes; orjson is optional
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    _json_loads = json.loads
+
+
+# UPSERT (3.24) and RETURNING (3.35) are used throughout
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Hot INSERTs, kept as constants so every call reuses the connection's
+# cached prepared statement (see also the _SQL_* statements below)
+_SQL_LOG_ACTION = """
+    INSERT INTO actions 
+    (player_name, room_code, action_type, amount, timestamp, round_id, game_phase, details)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_LOG_TRANSACTION = """
+    INSERT INTO transactions 
+    (player_name, transaction_type, amount, balance_before, balance_after, 
+     timestamp, description, round_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Column lists for the hot reads, spelled out rather than SELECT * so the
+# result shape doesn't change when a column is added to the table. These
+# reads fetch plain tuples and zip them with the key tuple, which is
+# cheaper than sqlite3.Row lookups plus dict(row)
+_WALLET_KEYS = ('player_name', 'balance', 'total_winnings', 'total_losses', 'games_played',
+                'last_activity', 'created_at')
+_ACTION_KEYS = ('id', 'player_name', 'room_code', 'action_type', 'amount', 'timestamp',
+                'round_id', 'game_phase', 'details')
+_TRANSACTION_KEYS = ('id', 'player_name', 'transaction_type', 'amount', 'balance_before',
+                     'balance_after', 'timestamp', 'description', 'round_id')
+_SSH_KEY_KEYS = ('id', 'username', 'public_key', 'key_type', 'key_comment', 'registered_at',
+                 'last_used')
+_LEADERBOARD_KEYS = ('player_name', 'balance', 'total_winnings', 'total_losses', 'games_played',
+                     'net_winnings')
+_WALLET_COLUMNS = ", ".join(_WALLET_KEYS)
+_ACTION_COLUMNS = ", ".join(_ACTION_KEYS)
+_TRANSACTION_COLUMNS = ", ".join(_TRANSACTION_KEYS)
+_SSH_KEY_COLUMNS = ", ".join(_SSH_KEY_KEYS)
+
+# Hot-path statements, built once so each call hands sqlite3 the same
+# string object and finds its prepared statement in the connection cache
+_SQL_GET_WALLET = f"SELECT {_WALLET_COLUMNS} FROM wallets WHERE player_name = ?"
+_SQL_CREATE_WALLET = f"""
+    INSERT INTO wallets 
+    (player_name, balance, total_winnings, total_losses, games_played, last_activity, created_at)
+    VALUES (?, 500, 0, 0, 0, ?, ?)
+    ON CONFLICT (player_name) DO NOTHING
+    RETURNING {_WALLET_COLUMNS}
+"""
+_SQL_LOG_BALANCE_CHANGE = """
+    INSERT INTO transactions 
+    (player_name, transaction_type, amount, balance_before, balance_after, 
+     timestamp, description, round_id)
+    SELECT player_name, ?, ? - balance, balance, ?, ?, ?, ?
+    FROM wallets
+    WHERE player_name = ? AND (balance != ? OR ? != 'GAME_RESULT')
+"""
+_SQL_SET_BALANCE = """
+    UPDATE wallets 
+    SET balance = ?, last_activity = ?
+    WHERE player_name = ?
+"""
+# RETURNING sees the updated row, so the old balance is balance - amount
+_SQL_CREDIT_WALLET = """
+    UPDATE wallets 
+    SET balance = balance + ?, last_activity = ?
+    WHERE player_name = ?
+    RETURNING balance - ?, balance
+"""
+# The right-hand sides all see the balance before this update
+_SQL_SETTLE_HAND = """
+    UPDATE wallets 
+    SET games_played = games_played + 1,
+        total_winnings = total_winnings + MAX(? - balance, 0),
+        total_losses = total_losses + MAX(balance - ?, 0),
+        balance = ?, last_activity = ?
+    WHERE player_name = ?
+"""
+_SQL_RECENT_ACTIONS = f"""
+    SELECT {_ACTION_COLUMNS}
+    FROM actions 
+    WHERE player_name = ? 
+    ORDER BY timestamp DESC 
+    LIMIT ?
+"""
+_SQL_RECENT_TRANSACTIONS = f"""
+    SELECT {_TRANSACTION_COLUMNS}
+    FROM transactions 
+    WHERE player_name = ? 
+    ORDER BY timestamp DESC 
+    LIMIT ?
+"""
+_SQL_AUTHORIZED_KEYS = f"""
+    SELECT {_SSH_KEY_COLUMNS} FROM ssh_keys 
+    WHERE username = ? 
+    ORDER BY registered_at DESC
+"""
+_SQL_ALL_SSH_KEYS = f"SELECT {_SSH_KEY_COLUMNS} FROM ssh_keys ORDER BY username, registered_at DESC"
+_SQL_KEY_AUTHORIZED = """
+    SELECT 1 FROM ssh_keys 
+    WHERE key_fingerprint = ? AND username = ?
+    LIMIT 1
+"""
+_SQL_KEY_OWNER = """
+    SELECT username FROM ssh_keys 
+    WHERE key_fingerprint = ? 
+    LIMIT 1
+"""
+
+# Per-login checks (AI seat refills, guest reaping)
+_SQL_AI_RESPAWN_TIME = "SELECT respawn_time FROM ai_respawns WHERE ai_name = ?"
+_SQL_GUEST_LAST_ACTIVITY = "SELECT last_activity FROM guest_accounts WHERE username = ?"
+# Upserts update the existing guest row in place; REPLACE would delete and
+# re-insert it, and every COALESCE((SELECT ...)) was another index probe
+_SQL_TOUCH_GUEST = """
+    INSERT INTO guest_accounts
+    (username, last_activity, last_reset, total_resets, created_at)
+    VALUES (?, ?, ?, 0, ?)
+    ON CONFLICT (username) DO UPDATE SET last_activity = excluded.last_activity
+"""
+_SQL_RESET_GUEST = """
+    INSERT INTO guest_accounts
+    (username, last_activity, last_reset, total_resets, created_at)
+    VALUES (?, ?, ?, 1, ?)
+    ON CONFLICT (username) DO UPDATE SET
+        last_activity = excluded.last_activity,
+        last_reset = excluded.last_reset,
+        total_resets = guest_accounts.total_resets + 1
+"""
+# Lowest guestN (1..?) with neither a guest_accounts row nor a wallet (in
+# case guest_accounts is missing one); each probe is a primary-key lookup
+_SQL_FREE_GUEST_NAME = """
+    WITH RECURSIVE nums(n) AS (
+        SELECT 1
+        UNION ALL
+        SELECT n + 1 FROM nums WHERE n < ?
+    )
+    SELECT 'guest' || n FROM nums
+    WHERE NOT EXISTS (SELECT 1 FROM guest_accounts WHERE username = 'guest' || n)
+      AND NOT EXISTS (SELECT 1 FROM wallets WHERE player_name = 'guest' || n)
+    LIMIT 1
+"""
+_SQL_RESET_WALLET = """
+    INSERT INTO wallets 
+    (player_name, balance, total_winnings, total_losses, games_played, last_activity, created_at)
+    VALUES (?, 500, 0, 0, 0, ?, ?)
+    ON CONFLICT (player_name) DO UPDATE SET
+        balance = 500, total_winnings = 0, total_losses = 0, games_played = 0,
+        last_activity = excluded.last_activity, created_at = excluded.created_at
+"""
+
+
+_GUEST_NAME_RE = re.compile(r'guest[0-9]*')
+
+
+@lru_cache(maxsize=1024)
+def is_guest_username(username: str) -> bool:
+    """Check if username is a guest account (guest, guest1, guest2, etc.)."""
+    return _GUEST_NAME_RE.fullmatch(username) is not None
+
+
+def _key_fingerprint(public_key: str) -> bytes:
+    """SHA-256 digest of a public key, used to look keys up by a short value."""
+    return hashlib.sha256(public_key.encode('utf-8')).digest()
+
 
 class DatabaseManager:
     """Manages SQLite database operations for the poker server."""
+
+    # Write-behind batching for the action log: the writer commits once it
+    # has this many rows, or once the first queued row is this old
+    ACTION_BATCH_SIZE = 200
+    ACTION_BATCH_WAIT = 0.05
+
+    # Most read-only connections kept open for read_cursor()
+    READER_POOL_SIZE = 8
+
+    # Rows deleted per transaction by cleanup_old_data
+    CLEANUP_BATCH_SIZE = 10000
+
+    # Usernames bound per DELETE ... IN (...) by bulk_reset_guest_accounts,
+    # well under SQLite's host-parameter limit
+    GUEST_RESET_BATCH_SIZE = 500
+
+    # Short-lived read cache for get_wallet; every write to a wallet row
+    # drops its entry, the TTL only bounds staleness from outside writers
+    WALLET_CACHE_SIZE = 1024
+    WALLET_CACHE_TTL = 1.0
     
     def __init__(self, db_path: str = "poker_data.db"):
         self.db_path = Path(db_path).resolve()
-        self._local = threading.local()
+        # One writer connection per thread, kept here rather than in a
+        # threading.local so connections left by finished threads (e.g. SSH
+        # sessions) can be closed instead of leaking
+        self._writers: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._writers_lock = threading.Lock()
+        self._action_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._action_writer: Optional[threading.Thread] = None
+        self._action_writer_lock = threading.Lock()
+        self._wallet_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Bumped by every _forget_wallet, so a read that raced a write can
+        # tell and doesn't cache the row it fetched before that write
+        self._wallet_generations: Dict[str, int] = {}
+        self._wallet_cache_lock = threading.Lock()
+        self._reader_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
         self._init_database()
         
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a thread-local database connection."""
-        if not hasattr(self._local, 'connection'):
-            self._local.connection = sqlite3.connect(
-                self.db_path,
-                check_same_thread=False,
-                timeout=30.0
-            )
-            self._local.connection.row_factory = sqlite3.Row
-            # Enable foreign keys and WAL mode for better concurrency
-            self._local.connection.execute("PRAGMA foreign_keys = ON")
-            self._local.connection.execute("PRAGMA journal_mode = WAL")
-        return self._local.connection
+        """Get this thread's database connection, opening it on first use."""
+        thread = threading.current_thread()
+        conn = self._writers.get(thread)
+        if conn is None:
+            conn = self._open_writer()
+            with self._writers_lock:
+                # Close connections whose threads have finished
+                for dead in [t for t in self._writers if not t.is_alive()]:
+                    self._writers.pop(dead).close()
+                self._writers[thread] = conn
+        return conn
+
+    def _open_writer(self) -> sqlite3.Connection:
+        """Open a read-write connection for the calling thread."""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=30.0,
+            cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        # Enable foreign keys and WAL mode for better concurrency
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode NORMAL only fsyncs at checkpoints, not on every commit;
+        # a power loss can drop the last few commits but never corrupts the file
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # Checkpoint the WAL back into the database every 1000 pages
+        conn.execute("PRAGMA wal_autocheckpoint = 1000")
+        # Keep sort/GROUP BY scratch space in memory and give each connection
+        # a larger page cache (negative value = KiB) for the audit/stats scans
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -65536")
+        # Read pages straight from a memory mapping of the first 256 MB of
+        # the file instead of copying them in with read() syscalls
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
     
+    def _open_reader(self) -> sqlite3.Connection:
+        """Open a read-only connection for the reader pool."""
+        conn = sqlite3.connect(
+            f"{self.db_path.as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=30.0,
+            cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -65536")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    @contextmanager
+    def read_cursor(self):
+        """Get a cursor on a pooled read-only connection.
+
+        Readers are shared by every thread, so a new thread doesn't open (and
+        warm up) a connection of its own just to run a SELECT. The pool grows
+        to READER_POOL_SIZE connections; beyond that callers wait for one.
+        Under WAL, readers see everything committed before they start.
+        """
+        try:
+            conn = self._reader_pool.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                grow = self._reader_count < self.READER_POOL_SIZE
+                if grow:
+                    self._reader_count += 1
+            if grow:
+                try:
+                    conn = self._open_reader()
+                except Exception:
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                conn = self._reader_pool.get()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self._reader_pool.put(conn)
+
     @contextmanager
-    def get_cursor(self):
-        """Get a database cursor with automatic commit/rollback."""
+    def get_cursor(self, immediate: bool = False):
+        """Get a database cursor with automatic commit/rollback.
+
+        With immediate=True the transaction opens with BEGIN IMMEDIATE, taking
+        the write lock up front instead of on the first write, so a
+        multi-statement write can't fail halfway through on a busy lock.
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
         try:
+            if immediate and not conn.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
             yield cursor
             conn.commit()
         except Exception:
@@ -53,6 +349,11 @@ class DatabaseManager:
     
     def _init_database(self):
         """Initialize database tables."""
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))}+ is required "
+                f"(found {sqlite3.sqlite_version})"
+            )
         with self.get_cursor() as cursor:
             # Wallets table - stores persistent player balances
             cursor.execute("""
@@ -129,9 +430,20 @@ class DatabaseManager:
                     key_type TEXT NOT NULL,
                     key_comment TEXT,
                     registered_at REAL NOT NULL,
-                    last_used REAL NOT NULL DEFAULT 0
+                    last_used REAL NOT NULL DEFAULT 0,
+                    key_fingerprint BLOB
                 )
             """)
+            # Databases created before key_fingerprint existed: add the column
+            # and fingerprint the keys already registered
+            cursor.execute("PRAGMA table_info(ssh_keys)")
+            if 'key_fingerprint' not in {row['name'] for row in cursor.fetchall()}:
+                cursor.execute("ALTER TABLE ssh_keys ADD COLUMN key_fingerprint BLOB")
+            cursor.execute("SELECT id, public_key FROM ssh_keys WHERE key_fingerprint IS NULL")
+            cursor.executemany(
+                "UPDATE ssh_keys SET key_fingerprint = ? WHERE id = ?",
+                [(_key_fingerprint(public_key), key_id) for key_id, public_key in cursor.fetchall()]
+            )
             
             # Guest accounts table - tracks guest account activity and reset status
             cursor.execute("""
@@ -145,14 +457,34 @@ class DatabaseManager:
             """)
             
             # Create indexes for better performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_player ON actions (player_name)")
+            # Recent-actions reads filter by player and sort newest first: one
+            # composite index serves both, superseding the player-only index
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_player_ts ON actions (player_name, timestamp DESC)")
+            cursor.execute("DROP INDEX IF EXISTS idx_actions_player")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_actions_timestamp ON actions (timestamp)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_player ON transactions (player_name)")
+            # Per-player history is always read newest/oldest first, so index the
+            # timestamp alongside the player; this supersedes the old single-column index
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_player_ts ON transactions (player_name, timestamp)")
+            cursor.execute("DROP INDEX IF EXISTS idx_transactions_player")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_wallets_activity ON wallets (last_activity)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_wallets_balance ON wallets (balance DESC)")
+            # Leaderboard: only wallets that have played, highest winnings first,
+            # with every selected column included so the read is index-only
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_wallets_winnings
+                ON wallets (total_winnings DESC, player_name, balance, total_losses, games_played)
+                WHERE games_played > 0
+            """)
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_bonuses_player ON daily_bonuses (player_name)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_ssh_keys_username ON ssh_keys (username)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ssh_keys_public_key ON ssh_keys (public_key)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_guest_accounts_activity ON guest_accounts (last_activity)")
+            # Keys are looked up by their 32-byte fingerprint rather than the
+            # full ~400-byte key text (the UNIQUE constraint still indexes that)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_ssh_keys_fp ON ssh_keys (key_fingerprint)")
+            cursor.execute("DROP INDEX IF EXISTS idx_ssh_keys_public_key")
+            # Inactive-guest sweeps range over last_activity and only want the
+            # username, so carry it in the index and skip the table lookup
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_guest_accounts_activity_user ON guest_accounts (last_activity, username)")
+            cursor.execute("DROP INDEX IF EXISTS idx_guest_accounts_activity")
             # Healthcheck history table - stores recent probe results for health UI
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS health_history (
@@ -164,130 +496,326 @@ class DatabaseManager:
                 )
             """)
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_health_ts ON health_history (ts)")
+
+            # Per-player transaction totals, kept current by triggers so the
+            # integrity check reads one row per player instead of aggregating
+            # the whole transactions table. WALLET_CREATED rows are not counted
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'wallet_stats_cache'")
+            stats_table_exists = cursor.fetchone() is not None
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS wallet_stats_cache (
+                    player_name TEXT PRIMARY KEY,
+                    tx_count INTEGER NOT NULL DEFAULT 0,
+                    credits_sum INTEGER NOT NULL DEFAULT 0,
+                    debits_sum INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_transactions_stats_insert
+                AFTER INSERT ON transactions
+                WHEN NEW.transaction_type != 'WALLET_CREATED'
+                BEGIN
+                    INSERT INTO wallet_stats_cache (player_name, tx_count, credits_sum, debits_sum)
+                    VALUES (NEW.player_name, 1, MAX(NEW.amount, 0), MAX(-NEW.amount, 0))
+                    ON CONFLICT (player_name) DO UPDATE SET
+                        tx_count = tx_count + 1,
+                        credits_sum = credits_sum + MAX(NEW.amount, 0),
+                        debits_sum = debits_sum + MAX(-NEW.amount, 0);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_transactions_stats_delete
+                AFTER DELETE ON transactions
+                WHEN OLD.transaction_type != 'WALLET_CREATED'
+                BEGIN
+                    UPDATE wallet_stats_cache SET
+                        tx_count = tx_count - 1,
+                        credits_sum = credits_sum - MAX(OLD.amount, 0),
+                        debits_sum = debits_sum - MAX(-OLD.amount, 0)
+                    WHERE player_name = OLD.player_name;
+                END
+            """)
+            if not stats_table_exists:
+                # First run on an existing database: count what is already there
+                cursor.execute("""
+                    INSERT INTO wallet_stats_cache (player_name, tx_count, credits_sum, debits_sum)
+                    SELECT player_name, COUNT(*),
+                           SUM(MAX(amount, 0)), SUM(MAX(-amount, 0))
+                    FROM transactions
+                    WHERE transaction_type != 'WALLET_CREATED'
+                    GROUP BY player_name
+                """)
             
         logging.info(f"Database initialized at {self.db_path}")
     
+    def _cache_wallet(self, wallet: Dict[str, Any], generation: int) -> Dict[str, Any]:
+        """Remember a freshly read wallet; return a copy for the caller.
+
+        generation is the wallet's write generation from before the read. If
+        a write has been committed since, the row may predate it and is
+        returned without being cached.
+        """
+        with self._wallet_cache_lock:
+            if self._wallet_generations.get(wallet['player_name'], 0) != generation:
+                return dict(wallet)
+            cache = self._wallet_cache
+            cache[wallet['player_name']] = (wallet, time.monotonic() + self.WALLET_CACHE_TTL)
+            cache.move_to_end(wallet['player_name'])
+            if len(cache) > self.WALLET_CACHE_SIZE:
+                cache.popitem(last=False)
+        return dict(wallet)
+
+    def _forget_wallet(self, player_name: str) -> None:
+        """Drop a wallet from the read cache after writing to it."""
+        with self._wallet_cache_lock:
+            self._wallet_cache.pop(player_name, None)
+            self._wallet_generations[player_name] = self._wallet_generations.get(player_name, 0) + 1
+
     def get_wallet(self, player_name: str) -> Dict[str, Any]:
         """Get or create a wallet for a player."""
+        with self._wallet_cache_lock:
+            cached = self._wallet_cache.get(player_name)
+            if cached is not None:
+                if cached[1] > time.monotonic():
+                    self._wallet_cache.move_to_end(player_name)
+                    # Callers are free to mutate what they get back
+                    return dict(cached[0])
+                del self._wallet_cache[player_name]
+            generation = self._wallet_generations.get(player_name, 0)
+
         with self.get_cursor() as cursor:
+            cursor.row_factory = None
             cursor.execute(
-                "SELECT * FROM wallets WHERE player_name = ?",
+                _SQL_GET_WALLET,
                 (player_name,)
             )
             row = cursor.fetchone()
-            
             if row:
-                return {
-                    'player_name': row['player_name'],
-                    'balance': row['balance'],
-                    'total_winnings': row['total_winnings'],
-                    'total_losses': row['total_losses'],
-                    'games_played': row['games_played'],
-                    'last_activity': row['last_activity'],
-                    'created_at': row['created_at']
-                }
-            else:
-                # Create new wallet with default balance (use INSERT OR IGNORE to prevent duplicates)
-                now = time.time()
-                cursor.execute("""
-                    INSERT OR IGNORE INTO wallets 
-                    (player_name, balance, total_winnings, total_losses, games_played, last_activity, created_at)
-                    VALUES (?, 500, 0, 0, 0, ?, ?)
-                """, (player_name, now, now))
-                
-                # Check if we actually inserted (in case another thread beat us to it)
-                if cursor.rowcount > 0:
-                    # We created the wallet, log transaction
-                    cursor.connection.commit()
-                    
-                    self.log_transaction(
-                        player_name, 'WALLET_CREATED', 500, 0, 500,
-                        'New wallet created with starting balance'
-                    )
-                    logging.info(f"Created new wallet for {player_name} with $500 starting balance")
-                else:
-                    # Another thread created it, fetch the existing one
-                    logging.debug(f"Wallet already exists for {player_name}, fetching existing")
-                
-                # Return the wallet (either newly created or existing)
-                cursor.execute(
-                    "SELECT * FROM wallets WHERE player_name = ?",
-                    (player_name,)
-                )
-                row = cursor.fetchone()
-                
-                return {
-                    'player_name': row['player_name'],
-                    'balance': row['balance'],
-                    'total_winnings': row['total_winnings'],
-                    'total_losses': row['total_losses'],
-                    'games_played': row['games_played'],
-                    'last_activity': row['last_activity'],
-                    'created_at': row['created_at']
-                }
+                return self._cache_wallet(dict(zip(_WALLET_KEYS, row)), generation)
+
+            # Create new wallet with default balance; a wallet created
+            # concurrently by another thread falls through to a plain re-read
+            row = self._create_wallet(cursor, player_name)
+            if row:
+                return self._cache_wallet(dict(zip(_WALLET_KEYS, row)), generation)
+
+            # Another thread created it, fetch the existing one
+            logging.debug(f"Wallet already exists for {player_name}, fetching existing")
+            cursor.execute(
+                _SQL_GET_WALLET,
+                (player_name,)
+            )
+            return self._cache_wallet(dict(zip(_WALLET_KEYS, cursor.fetchone())), generation)
     
+    def _create_wallet(self, cursor: sqlite3.Cursor, player_name: str) -> Optional[tuple]:
+        """Create a wallet with the starting balance in the caller's transaction.
+
+        Logs WALLET_CREATED alongside it. Returns the new row, or None if the
+        wallet already exists (RETURNING only yields a row it inserted).
+        """
+        now = time.time()
+        cursor.execute(_SQL_CREATE_WALLET, (player_name, now, now))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(_SQL_LOG_TRANSACTION, (
+                player_name, 'WALLET_CREATED', 500, 0, 500,
+                now, 'New wallet created with starting balance', None))
+            logging.info(f"Created new wallet for {player_name} with $500 starting balance")
+        return row
+
     def update_wallet_balance(self, player_name: str, new_balance: int, 
                             transaction_type: str = 'GAME_RESULT', 
                             description: str = '', round_id: Optional[str] = None) -> bool:
         """Update a player's wallet balance and log the transaction."""
+        return self._set_balance(player_name, new_balance, transaction_type, description,
+                                 round_id, record_game=False)
+
+    def finalize_hand(self, player_name: str, new_balance: int,
+                      transaction_type: str = 'GAME_RESULT',
+                      description: str = '', round_id: Optional[str] = None) -> bool:
+        """Settle a player's hand: set the balance, log it and count the game.
+
+        Same as update_wallet_balance followed by update_game_stats with the
+        balance change, but in one transaction and one UPDATE.
+        """
+        return self._set_balance(player_name, new_balance, transaction_type, description,
+                                 round_id, record_game=True)
+
+    def _set_balance(self, player_name: str, new_balance: int, transaction_type: str,
+                     description: str, round_id: Optional[str], record_game: bool) -> bool:
+        """Set a wallet's balance and log the change, optionally counting a game."""
+        now = time.time()
         with self.get_cursor() as cursor:
-            # Get current balance
-            cursor.execute(
-                "SELECT balance FROM wallets WHERE player_name = ?",
-                (player_name,)
-            )
-            row = cursor.fetchone()
+            # Log the transaction straight from the current row, so the old
+            # balance never makes a round trip through Python. A GAME_RESULT
+            # that leaves the balance unchanged records nothing, so no row
+            cursor.execute(_SQL_LOG_BALANCE_CHANGE, (transaction_type, new_balance, new_balance, now, description, round_id,
+                  player_name, new_balance, transaction_type))
             
-            if not row:
-                # Create wallet if it doesn't exist first
-                wallet = self.get_wallet(player_name)
-                old_balance = wallet['balance']  # Use the actual balance from the newly created wallet (500)
-            else:
-                old_balance = row['balance']
+            if cursor.rowcount == 0:
+                # Either a no-op result or no wallet yet
+                cursor.execute("SELECT 1 FROM wallets WHERE player_name = ?", (player_name,))
+                if cursor.fetchone() is None:
+                    # Create wallet if it doesn't exist first, in this same
+                    # transaction, then log against its starting balance
+                    created = self._create_wallet(cursor, player_name)
+                    old_balance = created[_WALLET_KEYS.index('balance')]
+                    now = time.time()  # Keep this entry after WALLET_CREATED
+                    if old_balance != new_balance or transaction_type != 'GAME_RESULT':
+                        cursor.execute(_SQL_LOG_TRANSACTION, (
+                            player_name, transaction_type, new_balance - old_balance,
+                            old_balance, new_balance, now, description, round_id))
             
             # Update wallet
-            amount_change = new_balance - old_balance
-            now = time.time()
-            
-            cursor.execute("""
-                UPDATE wallets 
-                SET balance = ?, last_activity = ?
-                WHERE player_name = ?
-            """, (new_balance, now, player_name))
-            
-            # Log transaction
-            self.log_transaction(
-                player_name, transaction_type, amount_change, 
-                old_balance, new_balance, description, round_id
-            )
-            
-            return True
+            if record_game:
+                cursor.execute(_SQL_SETTLE_HAND, (new_balance, new_balance, new_balance, now, player_name))
+            else:
+                cursor.execute(_SQL_SET_BALANCE, (new_balance, now, player_name))
+        
+        # Only once committed, so no reader can re-cache the old row
+        self._forget_wallet(player_name)
+        return True
     
     def add_wallet_funds(self, player_name: str, amount: int, 
                         description: str = 'Manual add') -> Dict[str, Any]:
         """Add funds to a player's wallet."""
-        wallet = self.get_wallet(player_name)
-        new_balance = wallet['balance'] + amount
-        
-        self.update_wallet_balance(
-            player_name, new_balance, 'FUNDS_ADDED', description
-        )
+        with self.get_cursor() as cursor:
+            self._credit_wallet(cursor, player_name, amount, 'FUNDS_ADDED', description)
+        self._forget_wallet(player_name)
         
         return self.get_wallet(player_name)
+
+    def _credit_wallet(self, cursor: sqlite3.Cursor, player_name: str, amount: int,
+                       transaction_type: str, description: str = '') -> Tuple[int, int]:
+        """Add amount (negative to debit) to a wallet and log it, in the caller's transaction.
+
+        The balance is adjusted in SQL, so there is no read-modify-write
+        window for a concurrent update to slip into. Returns (old, new)
+        balances. The caller must _forget_wallet() once committed.
+        """
+        now = time.time()
+        cursor.execute(_SQL_CREDIT_WALLET, (amount, now, player_name, amount))
+        row = cursor.fetchone()
+        if row is None:
+            # Create wallet if it doesn't exist first. The UPDATE above already
+            # holds the write lock, so nobody else can create it meanwhile
+            self._create_wallet(cursor, player_name)
+            now = time.time()  # Keep this entry after WALLET_CREATED
+            cursor.execute(_SQL_CREDIT_WALLET, (amount, now, player_name, amount))
+            row = cursor.fetchone()
+        old_balance, new_balance = row
+        cursor.execute(_SQL_LOG_TRANSACTION, (
+            player_name, transaction_type, amount, old_balance, new_balance,
+            now, description, None))
+        return old_balance, new_balance
     
     def log_action(self, player_name: str, room_code: str, action_type: str,
                   amount: int = 0, round_id: Optional[str] = None, game_phase: Optional[str] = None,
                   details: Optional[str] = None) -> int:
-        """Log a game action."""
-        with self.get_cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO actions 
-                (player_name, room_code, action_type, amount, timestamp, round_id, game_phase, details)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (player_name, room_code, action_type, amount, time.time(), 
-                  round_id, game_phase, details))
-            
-            return cursor.lastrowid or 0
+        """Queue a game action for the background writer.
+
+        Actions are an audit log nobody waits on, so they are written in
+        batches off the caller's thread (usually the event loop). Always
+        returns 0; call flush() to make queued actions visible.
+        """
+        self._ensure_action_writer()
+        self._action_queue.put((player_name, room_code, action_type, amount, time.time(),
+                                round_id, game_phase, details))
+        return 0
+
+    def flush(self) -> None:
+        """Block until every queued action has been written."""
+        if self._action_writer is not None:
+            # A dead writer would leave the join waiting forever
+            self._ensure_action_writer()
+            self._action_queue.join()
+
+    def close_all(self) -> None:
+        """Flush queued actions and close every open connection.
+
+        Meant for shutdown: connections in use by other threads are closed
+        too. Any later call simply opens fresh connections.
+        """
+        self.flush()
+        with self._writers_lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for conn in writers:
+            conn.close()
+        with self._reader_lock:
+            while True:
+                try:
+                    conn = self._reader_pool.get_nowait()
+                except queue.Empty:
+                    break
+                self._reader_count -= 1
+                conn.close()
+
+    def _ensure_action_writer(self) -> None:
+        """Start the background action writer on first use, or again if it died."""
+        writer = self._action_writer
+        if writer is not None and writer.is_alive():
+            return
+        with self._action_writer_lock:
+            if self._action_writer is None or not self._action_writer.is_alive():
+                writer = threading.Thread(target=self._action_writer_loop,
+                                          name="poker-action-writer", daemon=True)
+                writer.start()
+                self._action_writer = writer
+
+    def _action_writer_loop(self) -> None:
+        """Drain the action queue, committing each batch in one transaction."""
+        action_queue = self._action_queue
+        while True:
+            batch = [action_queue.get()]
+            deadline = time.monotonic() + self.ACTION_BATCH_WAIT
+            while len(batch) < self.ACTION_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(action_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_actions(batch)
+            except Exception as e:
+                # Never let one batch take the writer thread down with it
+                logging.error(f"Failed to log {len(batch)} actions: {e}")
+            finally:
+                for _ in batch:
+                    action_queue.task_done()
+
+    @staticmethod
+    def _defer_foreign_keys(cursor: sqlite3.Cursor) -> None:
+        """Check foreign keys once at commit for the transaction about to start.
+
+        SQLite switches this back off at the end of every transaction, so
+        single-row writes elsewhere keep their immediate checks.
+        """
+        cursor.execute("PRAGMA defer_foreign_keys = ON")
+
+    def _write_actions(self, rows: List[tuple]) -> None:
+        """Insert action rows in one transaction, isolating any bad rows."""
+        sql = _SQL_LOG_ACTION
+        try:
+            with self.get_cursor() as cursor:
+                self._defer_foreign_keys(cursor)
+                cursor.executemany(sql, rows)
+            return
+        except Exception as e:
+            if len(rows) == 1:
+                logging.error(f"Failed to log action for {rows[0][0]}: {e}")
+                return
+        # One bad row (e.g. no wallet for the player, or an amount too big
+        # for an SQLite integer) fails the whole batch;
+        # retry row by row so the others still get written
+        for row in rows:
+            try:
+                with self.get_cursor() as cursor:
+                    cursor.execute(sql, row)
+            except Exception as e:
+                logging.error(f"Failed to log action for {row[0]}: {e}")
     
     def log_transaction(self, player_name: str, transaction_type: str, amount: int,
                        balance_before: int, balance_after: int, description: str = '',
@@ -296,38 +824,60 @@ class DatabaseManager:
         # Defensive: ensure wallet exists before inserting transaction
         self.get_wallet(player_name)
         with self.get_cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO transactions 
-                (player_name, transaction_type, amount, balance_before, balance_after, 
-                 timestamp, description, round_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (player_name, transaction_type, amount, balance_before, balance_after,
-                  time.time(), description, round_id))
+            cursor.execute(_SQL_LOG_TRANSACTION, (
+                player_name, transaction_type, amount, balance_before, balance_after,
+                time.time(), description, round_id))
             return cursor.lastrowid or 0
+
+    def log_actions_bulk(self, rows: List[Tuple]) -> int:
+        """Log several game actions in one transaction, bypassing the writer queue.
+
+        Each row is (player_name, room_code, action_type, amount, round_id,
+        game_phase, details), as for log_action. Returns the number of rows.
+        """
+        now = time.time()
+        with self.get_cursor() as cursor:
+            self._defer_foreign_keys(cursor)
+            cursor.executemany(_SQL_LOG_ACTION, [
+                (name, room, action_type, amount, now, round_id, phase, details)
+                for name, room, action_type, amount, round_id, phase, details in rows
+            ])
+        return len(rows)
+
+    def log_transactions_bulk(self, rows: List[Tuple]) -> int:
+        """Log several wallet transactions in one transaction.
+
+        Each row is (player_name, transaction_type, amount, balance_before,
+        balance_after, description, round_id). Returns the number of rows.
+        """
+        # Defensive: ensure every wallet exists to avoid FK errors
+        for player_name in {row[0] for row in rows}:
+            self.get_wallet(player_name)
+        now = time.time()
+        with self.get_cursor() as cursor:
+            self._defer_foreign_keys(cursor)
+            cursor.executemany(_SQL_LOG_TRANSACTION, [
+                (name, tx_type, amount, before, after, now, description, round_id)
+                for name, tx_type, amount, before, after, description, round_id in rows
+            ])
+        return len(rows)
     
     def get_player_actions(self, player_name: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent actions for a player."""
-        with self.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM actions 
-                WHERE player_name = ? 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, (player_name, limit))
+        self.flush()
+        with self.read_cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(_SQL_RECENT_ACTIONS, (player_name, limit))
             
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(zip(_ACTION_KEYS, row)) for row in cursor.fetchall()]
     
     def get_player_transactions(self, player_name: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent transactions for a player."""
-        with self.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM transactions 
-                WHERE player_name = ? 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, (player_name, limit))
+        with self.read_cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(_SQL_RECENT_TRANSACTIONS, (player_name, limit))
             
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(zip(_TRANSACTION_KEYS, row)) for row in cursor.fetchall()]
     
     def update_game_stats(self, player_name: str, winnings_change: int = 0) -> None:
         """Update player's game statistics."""
@@ -344,10 +894,12 @@ class DatabaseManager:
                     last_activity = ?
                 WHERE player_name = ?
             """, (winnings_to_add, losses_to_add, time.time(), player_name))
+        self._forget_wallet(player_name)
     
     def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get top players by total winnings."""
-        with self.get_cursor() as cursor:
+        with self.read_cursor() as cursor:
+            cursor.row_factory = None
             cursor.execute("""
                 SELECT player_name, balance, total_winnings, total_losses, games_played,
                        (total_winnings - total_losses) as net_winnings
@@ -357,117 +909,116 @@ class DatabaseManager:
                 LIMIT ?
             """, (limit,))
             
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(zip(_LEADERBOARD_KEYS, row)) for row in cursor.fetchall()]
     
     def cleanup_old_data(self, days_old: int = 30) -> int:
         """Clean up old action logs (keep transactions for auditing)."""
         cutoff_time = time.time() - (days_old * 24 * 60 * 60)
         
-        with self.get_cursor() as cursor:
-            cursor.execute(
-                "DELETE FROM actions WHERE timestamp < ?",
-                (cutoff_time,)
-            )
-            return cursor.rowcount
+        # Delete in bounded chunks, each its own commit followed by a passive
+        # checkpoint, so the WAL never has to hold the whole deletion at once
+        batch_size = self.CLEANUP_BATCH_SIZE
+        total = 0
+        while True:
+            with self.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM actions WHERE rowid IN (
+                        SELECT rowid FROM actions WHERE timestamp < ? LIMIT ?
+                    )
+                """, (cutoff_time, batch_size))
+                deleted = cursor.rowcount
+            total += deleted
+            self._get_connection().execute("PRAGMA wal_checkpoint(PASSIVE)")
+            if deleted < batch_size:
+                return total
     
     def get_database_stats(self) -> Dict[str, Any]:
         """Get database statistics."""
-        with self.get_cursor() as cursor:
-            stats = {}
-            
-            # Count records
-            cursor.execute("SELECT COUNT(*) as count FROM wallets")
-            stats['total_wallets'] = cursor.fetchone()['count']
-            
-            cursor.execute("SELECT COUNT(*) as count FROM actions")
-            stats['total_actions'] = cursor.fetchone()['count']
-            
-            cursor.execute("SELECT COUNT(*) as count FROM transactions")
-            stats['total_transactions'] = cursor.fetchone()['count']
-            
-            # Get active players (played in last 7 days)
-            week_ago = time.time() - (7 * 24 * 60 * 60)
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM wallets WHERE last_activity > ?",
-                (week_ago,)
-            )
-            stats['active_players'] = cursor.fetchone()['count']
-            
-            # Total money in circulation
-            cursor.execute("SELECT SUM(balance) as total FROM wallets")
-            stats['total_balance'] = cursor.fetchone()['total'] or 0
-            
-            # Check for suspicious large balances
-            cursor.execute("SELECT COUNT(*) as count FROM wallets WHERE balance > 50000")
-            stats['suspicious_balances'] = cursor.fetchone()['count']
-            
-            return stats
+        # Active players = played in the last 7 days
+        week_ago = time.time() - (7 * 24 * 60 * 60)
+
+        self.flush()
+        with self.read_cursor() as cursor:
+            # One statement: the wallet figures come from a single pass over
+            # wallets, the other tables only contribute their row counts
+            cursor.execute("""
+                SELECT COUNT(*) AS total_wallets,
+                       (SELECT COUNT(*) FROM actions) AS total_actions,
+                       (SELECT COUNT(*) FROM transactions) AS total_transactions,
+                       COALESCE(SUM(last_activity > ?), 0) AS active_players,
+                       COALESCE(SUM(balance), 0) AS total_balance,
+                       COALESCE(SUM(balance > 50000), 0) AS suspicious_balances
+                FROM wallets
+            """, (week_ago,))
+            return dict(cursor.fetchone())
 
     def check_database_integrity(self) -> List[str]:
         """Check database for potential integrity issues."""
-        issues = []
+        large, negative, heavy, extreme = [], [], [], []
         
-        with self.get_cursor() as cursor:
-            # Check for wallets with excessive balances
-            cursor.execute("SELECT player_name, balance FROM wallets WHERE balance > 100000")
-            large_balances = cursor.fetchall()
-            for row in large_balances:
-                issues.append(f"Suspicious large balance: {row['player_name']} has ${row['balance']}")
-            
-            # Check for negative balances
-            cursor.execute("SELECT player_name, balance FROM wallets WHERE balance < 0")
-            negative_balances = cursor.fetchall()
-            for row in negative_balances:
-                issues.append(f"Negative balance: {row['player_name']} has ${row['balance']}")
-            
-            # Check for transaction inconsistencies
+        with self.read_cursor() as cursor:
+            # Rows are unpacked positionally rather than by column name
+            # One pass over wallets for all the per-wallet checks. A wallet can
+            # fail several at once, so each check gets its own flag column
             cursor.execute("""
-                SELECT player_name, COUNT(*) as count, 
-                       SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) as credits,
-                       SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END) as debits
-                FROM transactions 
-                WHERE transaction_type != 'WALLET_CREATED'
-                GROUP BY player_name
-                HAVING COUNT(*) > 100
+                SELECT player_name, balance, total_winnings, total_losses,
+                       (total_winnings - total_losses) AS net,
+                       balance > 100000 AS is_large,
+                       balance < 0 AS is_negative,
+                       (total_winnings > 50000 OR total_losses > 50000
+                        OR ABS(total_winnings - total_losses) > 75000) AS is_extreme
+                FROM wallets
+                WHERE balance > 100000 OR balance < 0
+                   OR total_winnings > 50000 OR total_losses > 50000
+                   OR ABS(total_winnings - total_losses) > 75000
             """)
-            heavy_activity = cursor.fetchall()
-            for row in heavy_activity:
-                issues.append(f"Heavy transaction activity: {row['player_name']} has {row['count']} transactions")
+            for name, balance, winnings, losses, net, is_large, is_negative, is_extreme in cursor:
+                # Check for wallets with excessive balances
+                if is_large:
+                    large.append(f"Suspicious large balance: {name} has ${balance}")
+                # Check for negative balances
+                if is_negative:
+                    negative.append(f"Negative balance: {name} has ${balance}")
+                # Check for players with huge win/loss streaks
+                if is_extreme:
+                    extreme.append(f"Extreme stats: {name} - Winnings: ${winnings}, Losses: ${losses}, Net: ${net}")
             
-            # Check for players with huge win/loss streaks
+            # Check for transaction inconsistencies
             cursor.execute("""
-                SELECT player_name, total_winnings, total_losses, balance,
-                       (total_winnings - total_losses) as net
-                FROM wallets 
-                WHERE total_winnings > 50000 OR total_losses > 50000 OR ABS(total_winnings - total_losses) > 75000
+                SELECT player_name, tx_count
+                FROM wallet_stats_cache
+                WHERE tx_count > 100
+                ORDER BY player_name
             """)
-            extreme_stats = cursor.fetchall()
-            for row in extreme_stats:
-                issues.append(f"Extreme stats: {row['player_name']} - Winnings: ${row['total_winnings']}, Losses: ${row['total_losses']}, Net: ${row['net']}")
+            for name, count in cursor:
+                heavy.append(f"Heavy transaction activity: {name} has {count} transactions")
         
+        # Same grouping and order as when each check was its own query
+        issues = large + negative + heavy + extreme
         return issues
 
     def audit_player_transactions(self, player_name: str) -> Dict[str, Any]:
         """Audit a player's transactions for inconsistencies."""
-        with self.get_cursor() as cursor:
+        with self.read_cursor() as cursor:
             # Get wallet info
-            cursor.execute("SELECT * FROM wallets WHERE player_name = ?", (player_name,))
+            cursor.execute("SELECT balance FROM wallets WHERE player_name = ?", (player_name,))
             wallet = cursor.fetchone()
             if not wallet:
                 return {"error": "Player not found"}
             
-            # Get all transactions
+            # Walk the transactions straight off the cursor rather than
+            # materialising them: heavy players can have a lot of them
             cursor.execute("""
-                SELECT * FROM transactions 
+                SELECT transaction_type, amount, balance_before, balance_after
+                FROM transactions 
                 WHERE player_name = ? 
                 ORDER BY timestamp ASC
             """, (player_name,))
-            transactions = cursor.fetchall()
             
             audit_result = {
                 "player_name": player_name,
                 "current_balance": wallet['balance'],
-                "transaction_count": len(transactions),
+                "transaction_count": 0,
                 "issues": [],
                 "summary": {
                     "total_credits": 0,
@@ -478,8 +1029,10 @@ class DatabaseManager:
             }
             
             expected_balance = 500  # Starting balance for new wallets
+            count = 0
             
-            for i, tx in enumerate(transactions):
+            for i, tx in enumerate(cursor):
+                count += 1
                 # Check if balance_after matches calculated balance
                 if tx['transaction_type'] == 'WALLET_CREATED':
                     expected_balance = tx['balance_after']
@@ -500,6 +1053,7 @@ class DatabaseManager:
                 else:
                     audit_result["summary"]["total_debits"] += abs(tx['amount'])
             
+            audit_result["transaction_count"] = count
             audit_result["summary"]["net_change"] = audit_result["summary"]["total_credits"] - audit_result["summary"]["total_debits"]
             audit_result["summary"]["calculated_balance"] = expected_balance
             
@@ -509,32 +1063,33 @@ class DatabaseManager:
             
             return audit_result
 
-        # -------------------- Healthcheck history helpers --------------------
-        def log_health_entry(self, ts: int, status: str, probe: Dict[str, Any]) -> int:
-            """Insert a healthcheck history entry. Probe dict stored as JSON."""
-            with self.get_cursor() as cursor:
-                cursor.execute(
-                    "INSERT INTO health_history (ts, status, probe, created_at) VALUES (?, ?, ?, ?)",
-                    (ts, status, json.dumps(probe), time.time())
-                )
-                return cursor.lastrowid or 0
+    # -------------------- Healthcheck history helpers --------------------
+    def log_health_entry(self, ts: int, status: str, probe: Dict[str, Any]) -> int:
+        """Insert a healthcheck history entry. Probe dict stored as JSON bytes."""
+        with self.get_cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO health_history (ts, status, probe, created_at) VALUES (?, ?, ?, ?)",
+                (ts, status, _json_dumps(probe), time.time())
+            )
+            return cursor.lastrowid or 0
 
-        def get_health_history(self, limit: int = 100) -> List[Dict[str, Any]]:
-            """Retrieve recent health history entries, most recent first."""
-            with self.get_cursor() as cursor:
-                cursor.execute(
-                    "SELECT ts, status, probe, created_at FROM health_history ORDER BY ts DESC LIMIT ?",
-                    (limit,)
-                )
-                rows = cursor.fetchall()
-                result = []
-                for row in rows:
-                    try:
-                        probe = json.loads(row['probe']) if row['probe'] else None
-                    except Exception:
-                        probe = None
-                    result.append({'ts': row['ts'], 'status': row['status'], 'probe': probe, 'created_at': row['created_at']})
-                return result
+    def get_health_history(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Retrieve recent health history entries, most recent first."""
+        with self.read_cursor() as cursor:
+            cursor.execute(
+                "SELECT ts, status, probe, created_at FROM health_history ORDER BY ts DESC LIMIT ?",
+                (limit,)
+            )
+            rows = cursor.fetchall()
+            result = []
+            for row in rows:
+                try:
+                    # Older rows hold JSON text, newer ones bytes; both parse
+                    probe = _json_loads(row['probe']) if row['probe'] else None
+                except ValueError:
+                    probe = None
+                result.append({'ts': row['ts'], 'status': row['status'], 'probe': probe, 'created_at': row['created_at']})
+            return result
 
     # -------------------- SSH Key Management Methods --------------------
 
@@ -544,9 +1099,10 @@ class DatabaseManager:
             with self.get_cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO ssh_keys 
-                    (username, public_key, key_type, key_comment, registered_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (username, public_key, key_type, key_comment, time.time()))
+                    (username, public_key, key_type, key_comment, registered_at, key_fingerprint)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (username, public_key, key_type, key_comment, time.time(),
+                      _key_fingerprint(public_key)))
                 return True
         except sqlite3.IntegrityError:
             # Key already registered for this user
@@ -557,25 +1113,19 @@ class DatabaseManager:
 
     def get_authorized_keys(self, username: str) -> List[Dict[str, Any]]:
         """Get all authorized SSH keys for a user."""
-        with self.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM ssh_keys 
-                WHERE username = ? 
-                ORDER BY registered_at DESC
-            """, (username,))
+        with self.read_cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(_SQL_AUTHORIZED_KEYS, (username,))
             
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(zip(_SSH_KEY_KEYS, row)) for row in cursor.fetchall()]
 
     def is_key_authorized(self, username: str, public_key: str) -> bool:
         """Check if a public key is authorized for a user."""
-        with self.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM ssh_keys 
-                WHERE username = ? AND public_key = ?
-            """, (username, public_key))
+        with self.read_cursor() as cursor:
+            # Existence check: stop at the first matching row instead of counting
+            cursor.execute(_SQL_KEY_AUTHORIZED, (_key_fingerprint(public_key), username))
             
-            result = cursor.fetchone()
-            return result['count'] > 0
+            return cursor.fetchone() is not None
 
     def update_key_last_used(self, username: str, public_key: str) -> None:
         """Update the last used timestamp for a key."""
@@ -583,39 +1133,36 @@ class DatabaseManager:
             cursor.execute("""
                 UPDATE ssh_keys 
                 SET last_used = ? 
-                WHERE username = ? AND public_key = ?
-            """, (time.time(), username, public_key))
+                WHERE key_fingerprint = ? AND username = ?
+            """, (time.time(), _key_fingerprint(public_key), username))
 
     def remove_ssh_key(self, username: str, public_key: str) -> bool:
         """Remove an SSH key for a user."""
         with self.get_cursor() as cursor:
             cursor.execute("""
                 DELETE FROM ssh_keys 
-                WHERE username = ? AND public_key = ?
-            """, (username, public_key))
+                WHERE key_fingerprint = ? AND username = ?
+            """, (_key_fingerprint(public_key), username))
             
             return cursor.rowcount > 0
 
     def get_all_ssh_keys(self) -> List[Dict[str, Any]]:
         """Get all SSH keys (for admin purposes)."""
-        with self.get_cursor() as cursor:
-            cursor.execute("SELECT * FROM ssh_keys ORDER BY username, registered_at DESC")
-            return [dict(row) for row in cursor.fetchall()]
+        with self.read_cursor() as cursor:
+            cursor.row_factory = None
+            cursor.execute(_SQL_ALL_SSH_KEYS)
+            return [dict(zip(_SSH_KEY_KEYS, row)) for row in cursor.fetchall()]
 
     def get_users_with_keys(self) -> List[str]:
         """Get list of all users who have registered SSH keys."""
-        with self.get_cursor() as cursor:
+        with self.read_cursor() as cursor:
             cursor.execute("SELECT DISTINCT username FROM ssh_keys ORDER BY username")
             return [row['username'] for row in cursor.fetchall()]
 
     def get_key_owner(self, public_key: str) -> Optional[str]:
         """Get the username that owns a specific SSH key."""
-        with self.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT username FROM ssh_keys 
-                WHERE public_key = ? 
-                LIMIT 1
-            """, (public_key,))
+        with self.read_cursor() as cursor:
+            cursor.execute(_SQL_KEY_OWNER, (_key_fingerprint(public_key),))
             
             row = cursor.fetchone()
             return row['username'] if row else None
@@ -628,7 +1175,7 @@ class DatabaseManager:
 
     def can_claim_bonus(self, player_name: str) -> Tuple[bool, str]:
         """Check if player can claim their hourly bonus."""
-        with self.get_cursor() as cursor:
+        with self.read_cursor() as cursor:
             # Get bonus record
             cursor.execute(
                 "SELECT * FROM daily_bonuses WHERE player_name = ?",
@@ -637,7 +1184,6 @@ class DatabaseManager:
             row = cursor.fetchone()
             
             now = time.time()
-            current_date = time.strftime("%Y-%m-%d", time.localtime(now))
             
             if not row:
                 # First time claiming
@@ -655,9 +1201,6 @@ class DatabaseManager:
     
     def claim_bonus(self, player_name: str, amount: int = 150) -> bool:
         """Claim hourly bonus for player."""
-        can_claim, message = self.can_claim_bonus(player_name)
-        if not can_claim:
-            return False
         # Ensure wallet exists before we insert rows that reference wallets via foreign keys
         try:
             self.get_wallet(player_name)
@@ -667,28 +1210,33 @@ class DatabaseManager:
 
         with self.get_cursor() as cursor:
             now = time.time()
-            current_date = time.strftime("%Y-%m-%d", time.localtime(now))
             
-            # Update or create bonus record
+            # Update or create bonus record, but only if the last claim is at
+            # least an hour old: the check and the claim are one statement, so
+            # two concurrent claims can't both succeed. RETURNING yields no
+            # row when the WHERE guard rejects the update
             cursor.execute("""
-                INSERT OR REPLACE INTO daily_bonuses 
+                INSERT INTO daily_bonuses 
                 (player_name, last_bonus_time, bonuses_claimed_today, last_bonus_date)
-                VALUES (?, ?, 
-                    CASE WHEN (SELECT last_bonus_date FROM daily_bonuses WHERE player_name = ?) = ? 
-                         THEN (SELECT bonuses_claimed_today FROM daily_bonuses WHERE player_name = ?) + 1
-                         ELSE 1 END,
-                    ?)
-            """, (player_name, now, player_name, current_date, player_name, current_date))
-            
-            # Add funds to wallet
-            wallet = self.get_wallet(player_name)
-            new_balance = wallet['balance'] + amount
-            self.update_wallet_balance(
-                player_name, new_balance, 'HOURLY_BONUS', 
-                f"Hourly bonus: ${amount}"
-            )
+                VALUES (?, ?, 1, strftime('%Y-%m-%d', ?, 'unixepoch', 'localtime'))
+                ON CONFLICT (player_name) DO UPDATE SET
+                    last_bonus_time = excluded.last_bonus_time,
+                    bonuses_claimed_today = CASE WHEN last_bonus_date = excluded.last_bonus_date
+                                                 THEN bonuses_claimed_today + 1
+                                                 ELSE 1 END,
+                    last_bonus_date = excluded.last_bonus_date
+                WHERE last_bonus_time <= excluded.last_bonus_time - 3600
+                RETURNING last_bonus_time
+            """, (player_name, now, now))
+            if cursor.fetchone() is None:
+                return False
             
-            return True
+            # Add funds to wallet, committed together with the claim
+            self._credit_wallet(cursor, player_name, amount, 'HOURLY_BONUS',
+                                f"Hourly bonus: ${amount}")
+        
+        self._forget_wallet(player_name)
+        return True
 
     def mark_ai_broke(self, ai_name: str) -> None:
         """Mark an AI player as broke and set respawn time."""
@@ -706,11 +1254,8 @@ class DatabaseManager:
 
     def can_ai_respawn(self, ai_name: str) -> bool:
         """Check if an AI player can respawn (30 minutes have passed since broke)."""
-        with self.get_cursor() as cursor:
-            cursor.execute(
-                "SELECT respawn_time FROM ai_respawns WHERE ai_name = ?",
-                (ai_name,)
-            )
+        with self.read_cursor() as cursor:
+            cursor.execute(_SQL_AI_RESPAWN_TIME, (ai_name,))
             row = cursor.fetchone()
             
             if not row:
@@ -730,39 +1275,24 @@ class DatabaseManager:
 
     def is_guest_account(self, username: str) -> bool:
         """Check if username is a guest account (guest, guest1, guest2, etc.)."""
-        if username == "guest":
-            return True
-        if username.startswith("guest") and len(username) > 5:
-            # Check if the part after "guest" is numeric
-            suffix = username[5:]
-            return suffix.isdigit()
-        return False
+        return is_guest_username(username)
 
     def update_guest_activity(self, username: str) -> None:
         """Update last activity timestamp for a guest account."""
-        if not self.is_guest_account(username):
+        if not is_guest_username(username):
             return
         
         now = time.time()
         with self.get_cursor() as cursor:
-            cursor.execute("""
-                INSERT OR REPLACE INTO guest_accounts 
-                (username, last_activity, last_reset, total_resets, created_at)
-                VALUES (?, ?, COALESCE((SELECT last_reset FROM guest_accounts WHERE username = ?), ?), 
-                        COALESCE((SELECT total_resets FROM guest_accounts WHERE username = ?), 0),
-                        COALESCE((SELECT created_at FROM guest_accounts WHERE username = ?), ?))
-            """, (username, now, username, now, username, username, now))
+            cursor.execute(_SQL_TOUCH_GUEST, (username, now, now, now))
 
     def should_reset_guest_account(self, username: str, inactivity_hours: int = 24) -> bool:
         """Check if a guest account should be reset due to inactivity."""
-        if not self.is_guest_account(username):
+        if not is_guest_username(username):
             return False
         
-        with self.get_cursor() as cursor:
-            cursor.execute(
-                "SELECT last_activity FROM guest_accounts WHERE username = ?",
-                (username,)
-            )
+        with self.read_cursor() as cursor:
+            cursor.execute(_SQL_GUEST_LAST_ACTIVITY, (username,))
             row = cursor.fetchone()
             
             if not row:
@@ -773,14 +1303,31 @@ class DatabaseManager:
             hours_since_activity = (now - row['last_activity']) / 3600
             return hours_since_activity >= inactivity_hours
 
+    def sweep_inactive_guests(self, inactivity_hours: int = 24) -> List[str]:
+        """Return every guest username inactive for at least inactivity_hours.
+
+        One index-only range scan, rather than should_reset_guest_account()
+        per known guest.
+        """
+        cutoff = time.time() - inactivity_hours * 3600
+        with self.read_cursor() as cursor:
+            cursor.execute(
+                "SELECT username FROM guest_accounts WHERE last_activity <= ? ORDER BY last_activity",
+                (cutoff,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
     def reset_guest_account(self, username: str) -> bool:
         """Reset a guest account (clear wallet, transactions, actions)."""
-        if not self.is_guest_account(username):
+        if not is_guest_username(username):
             return False
         
         now = time.time()
-        with self.get_cursor() as cursor:
-            try:
+        # Queued actions must land before the delete, not after the reset
+        self.flush()
+        # One write transaction: a failure part-way rolls back the deletes too
+        try:
+            with self.get_cursor(immediate=True) as cursor:
                 # Delete all transactions for this guest
                 cursor.execute("DELETE FROM transactions WHERE player_name = ?", (username,))
                 
@@ -788,33 +1335,58 @@ class DatabaseManager:
                 cursor.execute("DELETE FROM actions WHERE player_name = ?", (username,))
                 
                 # Reset wallet to default state
-                cursor.execute("""
-                    INSERT OR REPLACE INTO wallets 
-                    (player_name, balance, total_winnings, total_losses, games_played, last_activity, created_at)
-                    VALUES (?, 500, 0, 0, 0, ?, ?)
-                """, (username, now, now))
+                cursor.execute(_SQL_RESET_WALLET, (username, now, now))
                 
                 # Update guest account reset tracking
-                cursor.execute("""
-                    INSERT OR REPLACE INTO guest_accounts 
-                    (username, last_activity, last_reset, total_resets, created_at)
-                    VALUES (?, ?, ?, 
-                            COALESCE((SELECT total_resets FROM guest_accounts WHERE username = ?), 0) + 1,
-                            COALESCE((SELECT created_at FROM guest_accounts WHERE username = ?), ?))
-                """, (username, now, now, username, username, now))
-                
-                logging.info(f"Reset guest account {username} due to inactivity")
-                return True
-                
-            except Exception as e:
-                logging.error(f"Failed to reset guest account {username}: {e}")
-                return False
+                cursor.execute(_SQL_RESET_GUEST, (username, now, now, now))
+            
+            logging.info(f"Reset guest account {username} due to inactivity")
+            reset = True
+            
+        except Exception as e:
+            logging.error(f"Failed to reset guest account {username}: {e}")
+            reset = False
+        self._forget_wallet(username)
+        return reset
+
+    def bulk_reset_guest_accounts(self, usernames: List[str]) -> int:
+        """Reset many guest accounts at once, e.g. the result of sweep_inactive_guests().
+
+        Same as reset_guest_account() for each guest, but with one DELETE per
+        table per batch of names and a single transaction for the whole
+        sweep. Non-guest names are skipped. Returns how many were reset.
+        """
+        guests = list(dict.fromkeys(u for u in usernames if is_guest_username(u)))
+        if not guests:
+            return 0
+        
+        now = time.time()
+        # Queued actions must land before the delete, not after the reset
+        self.flush()
+        try:
+            with self.get_cursor(immediate=True) as cursor:
+                for start in range(0, len(guests), self.GUEST_RESET_BATCH_SIZE):
+                    batch = guests[start:start + self.GUEST_RESET_BATCH_SIZE]
+                    marks = ", ".join("?" * len(batch))
+                    cursor.execute(f"DELETE FROM transactions WHERE player_name IN ({marks})", batch)
+                    cursor.execute(f"DELETE FROM actions WHERE player_name IN ({marks})", batch)
+                cursor.executemany(_SQL_RESET_WALLET, [(u, now, now) for u in guests])
+                cursor.executemany(_SQL_RESET_GUEST, [(u, now, now, now) for u in guests])
+        except Exception as e:
+            logging.error(f"Failed to reset {len(guests)} guest accounts: {e}")
+            return 0
+        finally:
+            for username in guests:
+                self._forget_wallet(username)
+        
+        logging.info(f"Reset {len(guests)} guest accounts due to inactivity")
+        return len(guests)
 
     def get_guest_reset_info(self, username: str) -> Optional[Dict[str, Any]]:
         """Get reset information for a guest account."""
-        if not self.is_guest_account(username):
+        if not is_guest_username(username):
             return None
-        with self.get_cursor() as cursor:
+        with self.read_cursor() as cursor:
             cursor.execute(
                 "SELECT last_reset, total_resets FROM guest_accounts WHERE username = ?",
                 (username,)
@@ -826,18 +1398,10 @@ class DatabaseManager:
                     'total_resets': row['total_resets']
                 }
             return None
-        with self.get_cursor() as cursor:
-            cursor.execute(
-                "SELECT username, last_activity, last_reset, total_resets, created_at FROM guest_accounts WHERE username = ?",
-                (username,)
-            )
-            row = cursor.fetchone()
-            if row:
-                return dict(row)
-            return None
+
     def list_guest_usernames(self) -> List[str]:
         """Return a list of currently known guest usernames."""
-        with self.get_cursor() as cursor:
+        with self.read_cursor() as cursor:
             cursor.execute("SELECT username FROM guest_accounts ORDER BY username")
             return [row['username'] for row in cursor.fetchall()]
 
@@ -846,62 +1410,56 @@ class DatabaseManager:
 
         Returns the allocated username (e.g., 'guest1') or None if none available.
         """
-        with self.get_cursor() as cursor:
-            # find existing guest usernames
-            cursor.execute("SELECT username FROM guest_accounts")
-            existing = {row['username'] for row in cursor.fetchall()}
-
-            # Also include any wallets that start with guest (in case guest_accounts missing for some reason)
-            cursor.execute("SELECT player_name FROM wallets WHERE player_name LIKE 'guest%'")
-            existing.update({row['player_name'] for row in cursor.fetchall()})
-
-            # Try to find the lowest available guest number
-            for i in range(1, max_guest + 1):
-                candidate = f"guest{i}"
-                if candidate not in existing:
-                    now = time.time()
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO guest_accounts
-                        (username, last_activity, last_reset, total_resets, created_at)
-                        VALUES (?, ?, COALESCE((SELECT last_reset FROM guest_accounts WHERE username = ?), 0),
-                                COALESCE((SELECT total_resets FROM guest_accounts WHERE username = ?), 0),
-                                COALESCE((SELECT created_at FROM guest_accounts WHERE username = ?), ?))
-                    """, (candidate, now, candidate, candidate, candidate, now))
-                    logging.info(f"Allocated guest username: {candidate}")
-                    return candidate
-
-            # No available guest found - oopsies
+        if max_guest < 1:
             return None
+        # Immediate, so two sessions can't both pick the same free name
+        with self.get_cursor(immediate=True) as cursor:
+            cursor.execute(_SQL_FREE_GUEST_NAME, (max_guest,))
+            row = cursor.fetchone()
+            if row is None:
+                # No available guest found - oopsies
+                return None
+
+            candidate = row[0]
+            now = time.time()
+            cursor.execute(_SQL_TOUCH_GUEST, (candidate, now, 0, now))
+            logging.info(f"Allocated guest username: {candidate}")
+            return candidate
 
     def touch_guest_activity(self, username: str) -> None:
         """Update last_activity for a guest username (create record if needed)."""
-        if not self.is_guest_account(username):
+        if not is_guest_username(username):
             return
         now = time.time()
         with self.get_cursor() as cursor:
-            cursor.execute("""
-                INSERT OR REPLACE INTO guest_accounts
-                (username, last_activity, last_reset, total_resets, created_at)
-                VALUES (?, ?, COALESCE((SELECT last_reset FROM guest_accounts WHERE username = ?), 0),
-                        COALESCE((SELECT total_resets FROM guest_accounts WHERE username = ?), 0),
-                        COALESCE((SELECT created_at FROM guest_accounts WHERE username = ?), ?))
-            """, (username, now, username, username, username, now))
+            cursor.execute(_SQL_TOUCH_GUEST, (username, now, 0, now))
 
 
 # Global database instance
 _db_manager: Optional[DatabaseManager] = None
+_db_lock = threading.Lock()
 
 
 def get_database() -> DatabaseManager:
     """Get the global database manager instance."""
     global _db_manager
-    if _db_manager is None:
-        _db_manager = DatabaseManager()
-    return _db_manager
+    manager = _db_manager
+    if manager is None:
+        with _db_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
+            manager = _db_manager
+    return manager
 
 
 def init_database(db_path: str = "poker_data.db") -> DatabaseManager:
-    """Initialize the global database manager."""
+    """Initialize the global database manager.
+
+    Calling this again for the same database file returns the existing
+    manager instead of re-running schema setup.
+    """
     global _db_manager
-    _db_manager = DatabaseManager(db_path)
-    return _db_manager
+    with _db_lock:
+        if _db_manager is None or _db_manager.db_path != Path(db_path).resolve():
+            _db_manager = DatabaseManager(db_path)
+        return _db_manager
@@ -33,10 +33,13 @@ def make_deck() -> List[Card]:
     return [(r, s) for r in ranks for s in suits]
 
 
+# Short rank labels indexed directly by rank (2..14)
+RANK_LABELS = tuple(str(r) for r in range(11)) + ('J', 'Q', 'K', 'A')
+
+
 def card_str(card: Card) -> str:
     r, s = card
-    names = {11: 'J', 12: 'Q', 13: 'K', 14: 'A'}
-    return f"{names.get(r, r)}{s}"
+    return f"{RANK_LABELS[r]}{s}"
 
 
 class GameEngine:
@@ -49,6 +52,7 @@ class GameEngine:
         self.pot = 0
         self.bets: Dict[str, int] = {}  # Total bets across all rounds
         self.round_bets: Dict[str, int] = {}  # Current betting round only
+        self.current_bet = 0  # Highest entry in round_bets, kept up to date by the betting engine
         self.action_history: List[str] = []
     
     def reset_round(self):
@@ -59,9 +63,11 @@ class GameEngine:
         self.community = []
         self.bets = {p.name: 0 for p in self.players}
         self.round_bets = {p.name: 0 for p in self.players}
+        self.current_bet = 0
         self.action_history = []
         for p in self.players:
             p.hand = []
+            p.hand_mask = 0
             p.state = 'active'
     
     def draw(self, n=1) -> List[Card]:
@@ -73,7 +79,9 @@ class GameEngine:
         """Deal 2 hole cards to each player."""
         for _ in range(2):
             for p in self.players:
-                p.hand.append(self.draw(1)[0])
+                card = self.draw(1)[0]
+                p.hand.append(card)
+                p.hand_mask |= 1 << card[0]
     
     def deal_flop(self):
         """Deal the flop (burn 1, deal 3 community cards)."""
@@ -94,20 +102,35 @@ class GameEngine:
     def reset_round_bets(self):
         """Reset betting amounts for the current betting round."""
         self.round_bets = {p.name: 0 for p in self.players}
+        self.current_bet = 0
     
     def get_public_state(self, include_all_hands=False, current_player_name=None) -> Dict[str, Any]:
         """Get the current public game state."""
-        state = {
-            'community': list(self.community),
-            'bets': dict(self.bets),
-            'round_bets': dict(self.round_bets),
-            'pot': self.pot,
-            'players': [(p.name, p.chips, p.state, p.is_ai) for p in self.players],
-            'action_history': list(self.action_history),
-            'current_player': current_player_name,
-        }
+        state = self.get_public_state_for(current_player_name, self.get_public_state_base())
         
         if include_all_hands:
             state['all_hands'] = {p.name: p.hand for p in self.players}
             
-        return state
\ No newline at end of file
+        return state
+
+    def get_public_state_base(self) -> Dict[str, Any]:
+        """Get the part of the public state that is fixed for a betting round.
+
+        Only the board qualifies: it is dealt between rounds, never during one.
+        Callers must treat the returned values as read-only, since they are
+        shared by every state built from this base.
+        """
+        return {'community': list(self.community)}
+
+    def get_public_state_for(self, current_player_name, base: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the public state for `current_player_name`'s turn on top of `base`."""
+        return dict(
+            base,
+            bets=dict(self.bets),
+            round_bets=dict(self.round_bets),
+            current_bet=self.current_bet,
+            pot=self.pot,
+            players=[(p.name, p.chips, p.state, p.is_ai) for p in self.players],
+            action_history=list(self.action_history),
+            current_player=current_player_name,
+        )
\ No newline at end of file
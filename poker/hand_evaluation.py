@@ -3,30 +3,31 @@ Hand evaluation for Poker-over-SSH.
 Extracted from game.py to modularize the codebase.
 """
 
-import itertools
-from typing import List, Tuple
-from poker.game_engine import Card, HAND_RANKS
+import random
+from typing import List, Optional, Tuple
+from poker.game_engine import Card, HAND_RANKS, make_deck
+
+
+# Rank names indexed directly by rank (2..14) so descriptions avoid per-call dicts
+_RANK_NAMES = tuple(str(r) for r in range(11)) + ('Jack', 'Queen', 'King', 'Ace')
+_RANK_NAMES_PLURAL = tuple(f"{r}s" for r in range(11)) + ('Jacks', 'Queens', 'Kings', 'Aces')
 
 
 def _is_straight(ranks: List[int]) -> Tuple[bool, List[int]]:
-    # ranks sorted desc, unique
-    rset = sorted(set(ranks), reverse=True)
-    # account for wheel (A-2-3-4-5)
-    if 14 in rset:
-        rset.append(1)
-
-    consec = 1
-    best_high = None
-    for i in range(len(rset) - 1):
-        if rset[i] - 1 == rset[i + 1]:
-            consec += 1
-            if consec >= 5:
-                best_high = rset[i - 3]
-        else:
-            consec = 1
-    if best_high is None:
+    # Pack ranks into a bitmask; bit i is set when rank i is present
+    mask = 0
+    for r in ranks:
+        mask |= 1 << r
+    # account for wheel (A-2-3-4-5): the ace also plays as rank 1
+    if mask & (1 << 14):
+        mask |= 1 << 1
+
+    # bit i survives only if ranks i..i+4 are all present
+    runs = mask & (mask >> 1) & (mask >> 2) & (mask >> 3) & (mask >> 4)
+    if not runs:
         return False, []
-    return True, [best_high]
+    # highest surviving bit is the lowest card of the best straight
+    return True, [runs.bit_length() + 3]
 
 
 def evaluate_5cards(cards: List[Card]) -> Tuple[int, List[int]]:
@@ -34,17 +35,21 @@ def evaluate_5cards(cards: List[Card]) -> Tuple[int, List[int]]:
 
     Higher tuple sorts as better hand.
     """
-    ranks = sorted([r for r, _ in cards], reverse=True)
-    suits = [s for _, s in cards]
-
-    # counts
+    # Single pass over the cards: collect ranks, rank counts and the flush flag
+    ranks = []
     counts = {}
-    for r in ranks:
+    first_suit = cards[0][1]
+    is_flush = True
+    for r, s in cards:
+        ranks.append(r)
         counts[r] = counts.get(r, 0) + 1
+        if s != first_suit:
+            is_flush = False
+    ranks.sort(reverse=True)
     counts_items = sorted(((cnt, r) for r, cnt in counts.items()), reverse=True)
 
-    is_flush = max(suits.count(s) for s in set(suits)) == 5
-    is_str, str_high = _is_straight(ranks)
+    # A straight needs five distinct ranks
+    is_str, str_high = _is_straight(ranks) if len(counts) == 5 else (False, [])
 
     if is_flush and is_str:
         return (HAND_RANKS['straight_flush'], str_high)
@@ -87,25 +92,132 @@ def evaluate_5cards(cards: List[Card]) -> Tuple[int, List[int]]:
 
 
 def best_hand_from_seven(cards7: List[Card]) -> Tuple[int, List[int]]:
-    # compute best 5-card combo from 7 cards
-    best = (-1, [])
-    for combo in itertools.combinations(cards7, 5):
-        val = evaluate_5cards(list(combo))
-        if val > best:
-            best = val
-    return best
+    """Return the best (category_rank, tiebreakers) that 5 to 7 cards can make.
+
+    Gives the same result as taking the best evaluate_5cards() over every
+    5-card combination, but reads the hand straight off the rank counts and
+    per-suit rank lists instead of scoring all 21 combinations.
+    """
+    if len(cards7) < 5:
+        return (-1, [])
+
+    counts = [0] * 15
+    by_suit = {}
+    for r, s in cards7:
+        counts[r] += 1
+        suited = by_suit.get(s)
+        if suited is None:
+            by_suit[s] = [r]
+        else:
+            suited.append(r)
+
+    # At most one suit can hold five of seven cards
+    flush_ranks = None
+    for suited in by_suit.values():
+        if len(suited) >= 5:
+            flush_ranks = sorted(suited, reverse=True)
+            is_sf, sf_high = _is_straight(flush_ranks)
+            if is_sf:
+                return (HAND_RANKS['straight_flush'], sf_high)
+            break
+
+    # Distinct ranks high to low, plus the ranks grouped by multiplicity
+    present = []
+    pairs = []
+    trips = []
+    quads = []
+    for r in range(14, 1, -1):
+        cnt = counts[r]
+        if cnt:
+            present.append(r)
+            if cnt == 2:
+                pairs.append(r)
+            elif cnt == 3:
+                trips.append(r)
+            elif cnt >= 4:
+                quads.append(r)
+
+    if quads:
+        quad_rank = quads[0]
+        kicker = next(r for r in present if r != quad_rank)
+        return (HAND_RANKS['quads'], [quad_rank, kicker])
+
+    if trips and (len(trips) > 1 or pairs):
+        # A second set of trips can play as the pair
+        pair = max(trips[1] if len(trips) > 1 else 0, pairs[0] if pairs else 0)
+        return (HAND_RANKS['fullhouse'], [trips[0], pair])
+
+    if flush_ranks:
+        return (HAND_RANKS['flush'], flush_ranks[:5])
+
+    is_str, str_high = _is_straight(present)
+    if is_str:
+        return (HAND_RANKS['straight'], str_high)
+
+    if trips:
+        trip_rank = trips[0]
+        return (HAND_RANKS['trips'], [trip_rank] + [r for r in present if r != trip_rank][:2])
+
+    if len(pairs) >= 2:
+        high_pair, low_pair = pairs[0], pairs[1]
+        # A third pair still counts as the kicker
+        kicker = next(r for r in present if r != high_pair and r != low_pair)
+        return (HAND_RANKS['two_pair'], [high_pair, low_pair, kicker])
+
+    if pairs:
+        pair = pairs[0]
+        return (HAND_RANKS['pair'], [pair] + [r for r in present if r != pair][:3])
+
+    return (HAND_RANKS['highcard'], present[:5])
+
+
+def estimate_equity(hole: List[Card], community: List[Card], n_opponents: int = 1,
+                    samples: int = 500, rng: Optional[random.Random] = None) -> float:
+    """Monte-Carlo estimate of the share of the pot `hole` wins at showdown.
+
+    Deals random opponent hands and board completions from the unseen cards
+    and averages wins plus split-pot shares, so the result is in [0, 1].
+    """
+    rng = rng or random
+    known = set(hole)
+    known.update(community)
+    deck = [c for c in make_deck() if c not in known]
+    need_board = 5 - len(community)
+    n_opponents = max(1, min(n_opponents, (len(deck) - need_board) // 2))
+    draw = need_board + 2 * n_opponents
+
+    # Hot loop: bind lookups locally, score our hand once when the board is
+    # complete, and stop scoring opponents as soon as one of them beats us
+    sample = rng.sample
+    evaluate = best_hand_from_seven
+    river_mine = evaluate(hole + community) if need_board == 0 else None
+
+    share = 0.0
+    for _ in range(samples):
+        cards = sample(deck, draw)
+        if river_mine is None:
+            board = community + cards[:need_board]
+            mine = evaluate(hole + board)
+        else:
+            board = community
+            mine = river_mine
+        ties = 0
+        for i in range(need_board, draw, 2):
+            val = evaluate(cards[i:i + 2] + board)
+            if val > mine:
+                break
+            if val == mine:
+                ties += 1
+        else:
+            share += 1.0 / (ties + 1)
+    return share / samples
 
 
 def hand_description(hand_rank: int, tiebreakers: List[int]) -> str:
     """Convert hand evaluation result to human-readable description."""
     
-    def rank_name(r: int) -> str:
-        names = {11: 'Jack', 12: 'Queen', 13: 'King', 14: 'Ace'}
-        return names.get(r, str(r))
-    
-    def rank_name_plural(r: int) -> str:
-        names = {11: 'Jacks', 12: 'Queens', 13: 'Kings', 14: 'Aces'}
-        return names.get(r, f"{r}s")
+    rank_name = _RANK_NAMES.__getitem__
+    rank_name_plural = _RANK_NAMES_PLURAL.__getitem__
     
     if hand_rank == HAND_RANKS['straight_flush']:
         if tiebreakers[0] == 14:  # Ace high straight flush
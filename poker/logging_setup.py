@@ -0,0 +1,15 @@
+"""
+Logging setup shared by the Poker-over-SSH entry points.
+"""
+
+import logging
+
+
+def configure(debug: bool = False) -> None:
+    """Configure root logging once for the process.
+
+    AsyncSSH's chatty per-channel messages (window changes etc.) are kept
+    at WARNING regardless of the requested level.
+    """
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+    logging.getLogger('asyncssh').setLevel(logging.WARNING)
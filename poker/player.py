@@ -14,17 +14,26 @@ from __future__ import annotations
 import asyncio
 import logging
 import uuid
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 class Player:
+    # Fixed attribute set: no per-instance __dict__, and a typo'd assignment
+    # fails loudly instead of silently adding a new attribute
+    __slots__ = (
+        'name', 'is_ai', 'chips', 'hand', 'hand_mask', 'state', 'rebuys',
+        'max_rebuys', 'round_id', 'initial_chips', 'actor',
+    )
+
     def __init__(self, name: str, is_ai: bool = False, chips: int = 200):
         self.name = name
         self.is_ai = is_ai
         self.chips = chips
         self.hand: List[Any] = []
+        self.hand_mask: int = 0  # Bit r set for each hole-card rank r; set when dealt
         self.state: str = 'active'  # active, folded, all-in, disconnected
         self.rebuys: int = 0  # Track number of rebuys
+        self.max_rebuys: Optional[int] = None  # Rebuy limit; None means unlimited
         self.round_id: Optional[str] = None  # Track current round for database logging
         self.initial_chips: int = chips  # Track starting chips for winnings calculation
         # actor(game_state) -> {'action': str, 'amount': int}
@@ -52,12 +61,17 @@ class PlayerManager:
     def __init__(self, room_code: str = "default"):
         self.players: List[Player] = []
         self.room_code = room_code
+        self._players_by_name: Dict[str, Player] = {}
+
+    def get_player(self, name: str) -> Optional[Player]:
+        """Look up a registered player by name."""
+        return self._players_by_name.get(name)
 
     def register_player(self, name: str, is_ai: bool = False, chips: int = 200) -> Player:
         logging.debug(f"PlayerManager.register_player: name={name}, is_ai={is_ai}, chips={chips}")
         
         # Check if player already exists
-        existing = next((p for p in self.players if p.name == name), None)
+        existing = self._players_by_name.get(name)
         if existing:
             logging.debug(f"Player {name} already exists, returning existing player")
             return existing
@@ -92,6 +106,7 @@ class PlayerManager:
         logging.debug(f"Player {name} created with round_id={player.round_id}")
         
         self.players.append(player)
+        self._players_by_name[name] = player
         logging.debug(f"Player {name} added to players list. Total players: {len(self.players)}")
         
         # Log player registration only for human players (who have wallets)
@@ -208,7 +223,7 @@ class PlayerManager:
     
     def sync_wallet_balance(self, player_name: str):
         """Sync a human player's wallet balance with their current chips."""
-        player = next((p for p in self.players if p.name == player_name), None)
+        player = self._players_by_name.get(player_name)
         if not player or player.is_ai:
             return
         
@@ -224,7 +239,7 @@ class PlayerManager:
     def log_player_action(self, player_name: str, action_type: str, amount: int = 0, 
                          game_phase: Optional[str] = None, details: Optional[str] = None):
         """Log a player action to the database."""
-        player = next((p for p in self.players if p.name == player_name), None)
+        player = self._players_by_name.get(player_name)
         if not player:
             return
         
@@ -39,10 +39,12 @@ class ShowdownEngine:
                 val = best_hand_from_seven(seven)
                 all_player_results[p.name] = val
         
-        # Evaluate only contenders for winner determination
+        # Evaluate only contenders for winner determination, reusing the
+        # display evaluation above instead of scoring the same cards twice
         for p in contenders:
-            seven = p.hand + self.game_engine.community
-            val = best_hand_from_seven(seven)
+            val = all_player_results.get(p.name)
+            if val is None:
+                val = best_hand_from_seven(p.hand + self.game_engine.community)
             results[p.name] = val
             if best_val is None or val > best_val:
                 best_val = val
@@ -79,6 +81,7 @@ class ShowdownEngine:
                     remaining[name] -= min_bet
 
             # Now award each constructed side-pot to the best eligible contender(s)
+            players_by_name = {p.name: p for p in self.game_engine.players}
             awarded_any = set()
             for pot_amount, eligible in side_pots:
                 if pot_amount <= 0 or not eligible:
@@ -102,7 +105,7 @@ class ShowdownEngine:
                 share = pot_amount // len(local_winners)
                 rem = pot_amount % len(local_winners)
                 for i, winner_name in enumerate(local_winners):
-                    winner_player = next((p for p in self.game_engine.players if p.name == winner_name), None)
+                    winner_player = players_by_name.get(winner_name)
                     if not winner_player:
                         continue
                     winner_player.chips += share
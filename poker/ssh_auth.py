@@ -4,6 +4,7 @@ Extracted from ssh_server.py to modularize the codebase.
 """
 
 import logging
+from poker.database import is_guest_username
 
 
 def get_ssh_connection_string() -> str:
@@ -21,13 +22,7 @@ class SSHAuthentication:
     
     def _is_guest_account(self, username: str) -> bool:
         """Check if username is a guest account (guest, guest1, guest2, etc.)."""
-        if username == "guest":
-            return True
-        if username.startswith("guest") and len(username) > 5:
-            # Check if the part after "guest" is numeric
-            suffix = username[5:]
-            return suffix.isdigit()
-        return False
+        return is_guest_username(username)
 
     def _check_and_reset_guest_account(self, username: str) -> bool:
         """Check if guest account needs reset and perform reset if needed. Returns True if reset occurred."""
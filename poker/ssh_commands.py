@@ -9,6 +9,83 @@ from typing import Optional
 from poker.terminal_ui import Colors
 
 
+# Full `help` output, sent in a single write
+_HELP_TEXT = (
+    "🎰 Poker-over-SSH Commands:\r\n"
+    "   help     Show this help\r\n"
+    "   whoami   Show connection info\r\n"
+    "   server   Show server information\r\n"
+    "   seat     Claim a seat using your SSH username\r\n"
+    "   players  List all players in current room\r\n"
+    "   start    Start a poker round (requires 1+ human players)\r\n"
+    "   wallet   Show your wallet balance and stats\r\n"
+    "   roomctl  Room management commands\r\n"
+    "   registerkey  Register SSH public key for authentication\r\n"
+    "   listkeys     List your registered SSH keys\r\n"
+    "   removekey    Remove an SSH key\r\n"
+    "   togglecards / tgc  - Toggle card visibility for privacy\r\n"
+    "   quit     Disconnect\r\n"
+    "\r\n💰 Wallet Commands:\r\n"
+    "   wallet               - Show wallet balance and stats\r\n"
+    "   wallet history       - Show transaction history\r\n"
+    "   wallet actions       - Show recent game actions\r\n"
+    "   wallet leaderboard   - Show top players\r\n"
+    "   wallet add           - Claim hourly bonus ($150, once per hour)\r\n"
+    "   wallet save          - Save wallet changes to database\r\n"
+    "   wallet saveall       - Save all wallets (admin only)\r\n"
+    "\r\n🏠 Room Commands:\r\n"
+    "   roomctl list           - List all rooms\r\n"
+    "   roomctl create [name]  - Create a new room\r\n"
+    "   roomctl join <code>    - Join a room by code\r\n"
+    "   roomctl info           - Show current room info\r\n"
+    "   roomctl share          - Share current room code\r\n"
+    "   roomctl extend         - Extend current room by 30 minutes\r\n"
+    "   roomctl delete         - Delete current room (creator only)\r\n"
+    "\r\n🎮 Game Commands:\r\n"
+    "   togglecards / tgc  - Toggle card visibility for privacy\r\n"
+    "   togglecards            - Toggle card visibility on/off\r\n"
+    "\r\n🔑 SSH Key Commands:\r\n"
+    "   registerkey <key>  Register SSH public key for authentication\r\n"
+    "   listkeys           List your registered SSH keys\r\n"
+    "   removekey <id>     Remove an SSH key by ID\r\n"
+    "\r\n💡 Tips:\r\n"
+    "   - Your wallet persists across server restarts\r\n"
+    "   - All actions are logged to the database\r\n"
+    "   - Rooms expire after 30 minutes unless extended\r\n"
+    "   - The default room never expires\r\n"
+    "   - Room codes are private and only visible to creators and members\r\n"
+    "   - Use 'roomctl share' to get your room's code to share with friends\r\n"
+    "   - Hide/show cards for privacy when streaming or when others can see your screen\r\n"
+    "   - Card visibility can be toggled by clicking the button or using commands\r\n"
+    "   - Register your SSH key to prevent impersonation: registerkey <your_key>\r\n"
+    "\r\n❯ "
+)
+
+# `roomctl` usage, sent in a single write
+_ROOMCTL_HELP_TEXT = (
+    "🏠 Room Management Commands:\r\n"
+    "  roomctl list           - List all active rooms\r\n"
+    "  roomctl create [name]  - Create a new room with optional name\r\n"
+    "  roomctl join <code>    - Join a room using its code\r\n"
+    "  roomctl info           - Show current room information\r\n"
+    "  roomctl share          - Share current room code with others\r\n"
+    "  roomctl extend         - Extend room expiry by 30 minutes\r\n"
+    "  roomctl delete         - Delete current room (creator only)\r\n"
+    "\r\n❯ "
+)
+
+# Replies with a single variable part, formatted with % when sent
+_SEAT_ARGS_TEMPLATE = (
+    f"❌ {Colors.RED}The 'seat' command no longer accepts arguments.{Colors.RESET}\r\n"
+    f"💡 Just type '{Colors.GREEN}seat{Colors.RESET}' to use your SSH username (%s)\r\n\r\n"
+    f"💡 Or disconnect and connect with a different username: {Colors.GREEN}ssh <other_username>@%s{Colors.RESET}\r\n❯ "
+)
+_UNKNOWN_COMMAND_TEMPLATE = (
+    "❓ Unknown command: %s\r\n"
+    f"💡 Type '{Colors.GREEN}help{Colors.RESET}' for available commands.\r\n\r\n❯ "
+)
+
+
 def get_ssh_connection_string() -> str:
     """Get the SSH connection string for this server"""
     from poker.server_info import get_server_info
@@ -18,14 +95,40 @@ def get_ssh_connection_string() -> str:
 
 class CommandProcessor:
     """Processes SSH commands for a session."""
-    
+
+    # Command dispatch: lowercased command -> (method, pass the command?, log description).
+    # Commands matching no exact entry are tried against the prefixes in order.
+    _EXACT_COMMANDS = {
+        "quit": ("_handle_quit", False, "disconnecting"),
+        "exit": ("_handle_quit", False, "disconnecting"),
+        "help": ("_show_help", False, "requested help"),
+        "whoami": ("_show_whoami", False, "requested whoami"),
+        "server": ("_show_server_info", False, "requested server info"),
+        "players": ("_show_players", False, "requested players list"),
+        "seat": ("_handle_seat", True, "attempting to seat"),
+        "start": ("_handle_start", False, "attempting to start game"),
+        "wallet": ("_handle_wallet", False, "requesting wallet info"),
+        "togglecards": ("_handle_toggle_cards", False, "toggling card visibility"),
+        "tgc": ("_handle_toggle_cards", False, "toggling card visibility"),
+    }
+    _PREFIX_COMMANDS = (
+        ("roomctl", ("_handle_roomctl", True, "executing roomctl command")),
+        ("seat ", ("_reject_seat_args", True, "tried seat with arguments")),
+        ("wallet ", ("_handle_wallet_command", True, "executing wallet command")),
+        ("registerkey", ("_handle_register_key", True, "registering SSH key")),
+        ("listkeys", ("_handle_list_keys", True, "listing SSH keys")),
+        ("removekey", ("_handle_remove_key", True, "removing SSH key")),
+    )
+
     def __init__(self, session):
         self.session = session
     
     async def process_command(self, cmd: str):
         """Process user commands."""
-        # Log all user commands for debugging
-        logging.debug(f"User {self.session._username} in room {self.session._current_room} executed command: '{cmd}'")
+        # Log all user commands for debugging; skip building the messages otherwise
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if debug:
+            logging.debug(f"User {self.session._username} in room {self.session._current_room} executed command: '{cmd}'")
         
         if not cmd:
             try:
@@ -35,99 +138,43 @@ class CommandProcessor:
                 pass
             return
 
-        if cmd.lower() in ("quit", "exit"):
-            logging.debug(f"User {self.session._username} disconnecting")
-            try:
-                self.session._stdout.write("Goodbye!\r\n")
-                await self.session._stdout.drain()
-            except Exception:
-                pass
-            await self.session._stop()
-            return
-
-        # Handle roomctl commands
-        if cmd.lower().startswith("roomctl"):
-            logging.debug(f"User {self.session._username} executing roomctl command: {cmd}")
-            await self._handle_roomctl(cmd)
-            return
-
-        if cmd.lower() == "help":
-            logging.debug(f"User {self.session._username} requested help")
-            await self._show_help()
-            return
-
-        if cmd.lower() == "whoami":
-            logging.debug(f"User {self.session._username} requested whoami")
-            await self._show_whoami()
-            return
-
-        if cmd.lower() == "server":
-            logging.debug(f"User {self.session._username} requested server info")
-            await self._show_server_info()
-            return
-
-        if cmd.lower() == "players":
-            logging.debug(f"User {self.session._username} requested players list")
-            await self._show_players()
-            return
-
-        if cmd.lower() == "seat":
-            logging.debug(f"User {self.session._username} attempting to seat")
-            await self._handle_seat(cmd)
+        low = cmd.lower()
+        entry = self._EXACT_COMMANDS.get(low)
+        if entry is None:
+            for prefix, prefix_entry in self._PREFIX_COMMANDS:
+                if low.startswith(prefix):
+                    entry = prefix_entry
+                    break
+        if entry is not None:
+            method, takes_cmd, description = entry
+            if debug:
+                logging.debug(f"User {self.session._username} {description}: {cmd}")
+            handler = getattr(self, method)
+            await (handler(cmd) if takes_cmd else handler())
             return
 
-        if cmd.lower().startswith("seat "):
-            # Reject seat commands with arguments
-            logging.debug(f"User {self.session._username} tried seat with arguments: {cmd}")
-            self.session._stdout.write(f"❌ {Colors.RED}The 'seat' command no longer accepts arguments.{Colors.RESET}\r\n")
-            self.session._stdout.write(f"💡 Just type '{Colors.GREEN}seat{Colors.RESET}' to use your SSH username ({self.session._username or 'not available'})\r\n\r\n")
-            self.session._stdout.write(f"💡 Or disconnect and connect with a different username: {Colors.GREEN}ssh <other_username>@{get_ssh_connection_string()}{Colors.RESET}\r\n❯ ")
+        # Unknown command
+        if debug:
+            logging.debug(f"User {self.session._username} used unknown command: {cmd}")
+        try:
+            self.session._stdout.write(_UNKNOWN_COMMAND_TEMPLATE % cmd)
             await self.session._stdout.drain()
-            return
-
-        if cmd.lower() == "start":
-            logging.debug(f"User {self.session._username} attempting to start game")
-            await self._handle_start()
-            return
-
-        if cmd.lower() == "wallet":
-            logging.debug(f"User {self.session._username} requesting wallet info")
-            await self._handle_wallet()
-            return
-
-        if cmd.lower().startswith("wallet "):
-            logging.debug(f"User {self.session._username} executing wallet command: {cmd}")
-            await self._handle_wallet_command(cmd)
-            return
-
-        if cmd.lower().startswith("registerkey"):
-            logging.debug(f"User {self.session._username} registering SSH key")
-            await self._handle_register_key(cmd)
-            return
-
-        if cmd.lower().startswith("listkeys"):
-            logging.debug(f"User {self.session._username} listing SSH keys")
-            await self._handle_list_keys(cmd)
-            return
-
-        if cmd.lower().startswith("removekey"):
-            logging.debug(f"User {self.session._username} removing SSH key")
-            await self._handle_remove_key(cmd)
-            return
-
-        if cmd.lower() in ("togglecards", "tgc"):
-            logging.debug(f"User {self.session._username} toggling card visibility")
-            await self._handle_toggle_cards()
-            return
+        except Exception:
+            pass
 
-        # Unknown command
-        logging.debug(f"User {self.session._username} used unknown command: {cmd}")
+    async def _handle_quit(self):
+        """Say goodbye and close the session."""
         try:
-            self.session._stdout.write(f"❓ Unknown command: {cmd}\r\n")
-            self.session._stdout.write(f"💡 Type '{Colors.GREEN}help{Colors.RESET}' for available commands.\r\n\r\n❯ ")
+            self.session._stdout.write("Goodbye!\r\n")
             await self.session._stdout.drain()
         except Exception:
             pass
+        await self.session._stop()
+
+    async def _reject_seat_args(self, cmd: str):
+        """Reject seat commands with arguments."""
+        self.session._stdout.write(_SEAT_ARGS_TEMPLATE % (self.session._username or 'not available', get_ssh_connection_string()))
+        await self.session._stdout.drain()
 
     async def _handle_roomctl(self, cmd: str):
         """Handle room control commands."""
@@ -163,54 +210,7 @@ class CommandProcessor:
     async def _show_help(self):
         """Show help information."""
         try:
-            self.session._stdout.write("🎰 Poker-over-SSH Commands:\r\n")
-            self.session._stdout.write("   help     Show this help\r\n")
-            self.session._stdout.write("   whoami   Show connection info\r\n")
-            self.session._stdout.write("   server   Show server information\r\n")
-            self.session._stdout.write("   seat     Claim a seat using your SSH username\r\n")
-            self.session._stdout.write("   players  List all players in current room\r\n")
-            self.session._stdout.write("   start    Start a poker round (requires 1+ human players)\r\n")
-            self.session._stdout.write("   wallet   Show your wallet balance and stats\r\n")
-            self.session._stdout.write("   roomctl  Room management commands\r\n")
-            self.session._stdout.write("   registerkey  Register SSH public key for authentication\r\n")
-            self.session._stdout.write("   listkeys     List your registered SSH keys\r\n")
-            self.session._stdout.write("   removekey    Remove an SSH key\r\n")
-            self.session._stdout.write("   togglecards / tgc  - Toggle card visibility for privacy\r\n")
-            self.session._stdout.write("   quit     Disconnect\r\n")
-            self.session._stdout.write("\r\n💰 Wallet Commands:\r\n")
-            self.session._stdout.write("   wallet               - Show wallet balance and stats\r\n")
-            self.session._stdout.write("   wallet history       - Show transaction history\r\n")
-            self.session._stdout.write("   wallet actions       - Show recent game actions\r\n")
-            self.session._stdout.write("   wallet leaderboard   - Show top players\r\n")
-            self.session._stdout.write("   wallet add           - Claim hourly bonus ($150, once per hour)\r\n")
-            self.session._stdout.write("   wallet save          - Save wallet changes to database\r\n")
-            self.session._stdout.write("   wallet saveall       - Save all wallets (admin only)\r\n")
-            self.session._stdout.write("\r\n🏠 Room Commands:\r\n")
-            self.session._stdout.write("   roomctl list           - List all rooms\r\n")
-            self.session._stdout.write("   roomctl create [name]  - Create a new room\r\n")
-            self.session._stdout.write("   roomctl join <code>    - Join a room by code\r\n")
-            self.session._stdout.write("   roomctl info           - Show current room info\r\n")
-            self.session._stdout.write("   roomctl share          - Share current room code\r\n")
-            self.session._stdout.write("   roomctl extend         - Extend current room by 30 minutes\r\n")
-            self.session._stdout.write("   roomctl delete         - Delete current room (creator only)\r\n")
-            self.session._stdout.write("\r\n🎮 Game Commands:\r\n")
-            self.session._stdout.write("   togglecards / tgc  - Toggle card visibility for privacy\r\n")
-            self.session._stdout.write("   togglecards            - Toggle card visibility on/off\r\n")
-            self.session._stdout.write("\r\n🔑 SSH Key Commands:\r\n")
-            self.session._stdout.write("   registerkey <key>  Register SSH public key for authentication\r\n")
-            self.session._stdout.write("   listkeys           List your registered SSH keys\r\n")
-            self.session._stdout.write("   removekey <id>     Remove an SSH key by ID\r\n")
-            self.session._stdout.write("\r\n💡 Tips:\r\n")
-            self.session._stdout.write("   - Your wallet persists across server restarts\r\n")
-            self.session._stdout.write("   - All actions are logged to the database\r\n")
-            self.session._stdout.write("   - Rooms expire after 30 minutes unless extended\r\n")
-            self.session._stdout.write("   - The default room never expires\r\n")
-            self.session._stdout.write("   - Room codes are private and only visible to creators and members\r\n")
-            self.session._stdout.write("   - Use 'roomctl share' to get your room's code to share with friends\r\n")
-            self.session._stdout.write("   - Hide/show cards for privacy when streaming or when others can see your screen\r\n")
-            self.session._stdout.write("   - Card visibility can be toggled by clicking the button or using commands\r\n")
-            self.session._stdout.write("   - Register your SSH key to prevent impersonation: registerkey <your_key>\r\n")
-            self.session._stdout.write("\r\n❯ ")
+            self.session._stdout.write(_HELP_TEXT)
             await self.session._stdout.drain()
         except Exception:
             pass
@@ -218,15 +218,7 @@ class CommandProcessor:
     async def _show_roomctl_help(self):
         """Show room control help."""
         try:
-            self.session._stdout.write("🏠 Room Management Commands:\r\n")
-            self.session._stdout.write("  roomctl list           - List all active rooms\r\n")
-            self.session._stdout.write("  roomctl create [name]  - Create a new room with optional name\r\n")
-            self.session._stdout.write("  roomctl join <code>    - Join a room using its code\r\n")
-            self.session._stdout.write("  roomctl info           - Show current room information\r\n")
-            self.session._stdout.write("  roomctl share          - Share current room code with others\r\n")
-            self.session._stdout.write("  roomctl extend         - Extend room expiry by 30 minutes\r\n")
-            self.session._stdout.write("  roomctl delete         - Delete current room (creator only)\r\n")
-            self.session._stdout.write("\r\n❯ ")
+            self.session._stdout.write(_ROOMCTL_HELP_TEXT)
             await self.session._stdout.drain()
         except Exception:
             pass
@@ -877,9 +869,11 @@ class CommandProcessor:
     async def _show_whoami(self):
         """Show connection information."""
         try:
-            self.session._stdout.write(f"👤 You are connected as: {Colors.CYAN}{self.session._username}{Colors.RESET}\r\n")
-            self.session._stdout.write(f"🏠 Current room: {Colors.GREEN}{self.session._current_room}{Colors.RESET}\r\n")
-            self.session._stdout.write("🎰 Connected to Poker-over-SSH\r\n\r\n❯ ")
+            self.session._stdout.write(
+                f"👤 You are connected as: {Colors.CYAN}{self.session._username}{Colors.RESET}\r\n"
+                f"🏠 Current room: {Colors.GREEN}{self.session._current_room}{Colors.RESET}\r\n"
+                "🎰 Connected to Poker-over-SSH\r\n\r\n❯ "
+            )
             await self.session._stdout.drain()
         except Exception:
             pass
@@ -891,21 +885,25 @@ class CommandProcessor:
             
             server_info = get_server_info()
             
-            self.session._stdout.write(f"{Colors.BOLD}{Colors.CYAN}🖥️  Server Information{Colors.RESET}\r\n")
-            self.session._stdout.write("=" * 40 + "\r\n")
-            self.session._stdout.write(f"📛 Name: {Colors.CYAN}{server_info['server_name']}{Colors.RESET}\r\n")
-            self.session._stdout.write(f"🌐 Environment: {Colors.GREEN if server_info['server_env'] == 'Public Stable' else Colors.YELLOW}{server_info['server_env']}{Colors.RESET}\r\n")
-            self.session._stdout.write(f"📍 Host: {Colors.BOLD}{server_info['server_host']}:{server_info['server_port']}{Colors.RESET}\r\n")
-            self.session._stdout.write(f"🔗 Connect: {Colors.DIM}ssh <username>@{server_info['ssh_connection_string']}{Colors.RESET}\r\n")
+            # Collect the whole screen and send it in one write
+            out = [
+                f"{Colors.BOLD}{Colors.CYAN}🖥️  Server Information{Colors.RESET}\r\n",
+                "=" * 40 + "\r\n",
+                f"📛 Name: {Colors.CYAN}{server_info['server_name']}{Colors.RESET}\r\n",
+                f"🌐 Environment: {Colors.GREEN if server_info['server_env'] == 'Public Stable' else Colors.YELLOW}{server_info['server_env']}{Colors.RESET}\r\n",
+                f"📍 Host: {Colors.BOLD}{server_info['server_host']}:{server_info['server_port']}{Colors.RESET}\r\n",
+                f"🔗 Connect: {Colors.DIM}ssh <username>@{server_info['ssh_connection_string']}{Colors.RESET}\r\n",
+            ]
             
             if server_info['version'] != 'dev':
-                self.session._stdout.write(f"📦 Version: {Colors.GREEN}{server_info['version']}{Colors.RESET}\r\n")
-                self.session._stdout.write(f"📅 Build Date: {Colors.DIM}{server_info['build_date']}{Colors.RESET}\r\n")
-                self.session._stdout.write(f"🔗 Commit: {Colors.DIM}{server_info['commit_hash']}{Colors.RESET}\r\n")
+                out.append(f"📦 Version: {Colors.GREEN}{server_info['version']}{Colors.RESET}\r\n")
+                out.append(f"📅 Build Date: {Colors.DIM}{server_info['build_date']}{Colors.RESET}\r\n")
+                out.append(f"🔗 Commit: {Colors.DIM}{server_info['commit_hash']}{Colors.RESET}\r\n")
             else:
-                self.session._stdout.write(f"🚧 {Colors.YELLOW}Development Build{Colors.RESET}\r\n")
+                out.append(f"🚧 {Colors.YELLOW}Development Build{Colors.RESET}\r\n")
             
-            self.session._stdout.write("\r\n❯ ")
+            out.append("\r\n❯ ")
+            self.session._stdout.write("".join(out))
             await self.session._stdout.drain()
         except Exception as e:
             self.session._stdout.write(f"❌ Error getting server info: {e}\r\n\r\n❯ ")
@@ -930,10 +928,13 @@ class CommandProcessor:
             
             players = room.pm.players
             if not players:
-                self.session._stdout.write(f"{Colors.DIM}No players registered in this room.{Colors.RESET}\r\n")
-                self.session._stdout.write(f"💡 Use '{Colors.GREEN}seat{Colors.RESET}' to join the game!\r\n\r\n❯ ")
+                self.session._stdout.write(
+                    f"{Colors.DIM}No players registered in this room.{Colors.RESET}\r\n"
+                    f"💡 Use '{Colors.GREEN}seat{Colors.RESET}' to join the game!\r\n\r\n❯ "
+                )
             else:
-                self.session._stdout.write(f"{Colors.BOLD}{Colors.MAGENTA}🎭 Players in {room.name}:{Colors.RESET}\r\n")
+                # Collect the whole listing and send it in one write
+                out = [f"{Colors.BOLD}{Colors.MAGENTA}🎭 Players in {room.name}:{Colors.RESET}\r\n"]
                 human_count = 0
                 ai_count = 0
                 for i, p in enumerate(players, 1):
@@ -947,14 +948,15 @@ class CommandProcessor:
                         type_label = f"{Colors.YELLOW}Human{Colors.RESET}"
                     
                     status = f"{Colors.GREEN}💚 online{Colors.RESET}" if any(session for session, player in room.session_map.items() if player == p) else f"{Colors.RED}💔 offline{Colors.RESET}"
-                    self.session._stdout.write(f"  {i}. {icon} {Colors.BOLD}{p.name}{Colors.RESET} - ${p.chips} - {type_label} - {status}\r\n")
+                    out.append(f"  {i}. {icon} {Colors.BOLD}{p.name}{Colors.RESET} - ${p.chips} - {type_label} - {status}\r\n")
                 
-                self.session._stdout.write(f"\r\n📊 Summary: {human_count} human, {ai_count} AI players")
+                out.append(f"\r\n📊 Summary: {human_count} human, {ai_count} AI players")
                 if human_count > 0:
-                    self.session._stdout.write(f" - {Colors.GREEN}Ready to start!{Colors.RESET}")
+                    out.append(f" - {Colors.GREEN}Ready to start!{Colors.RESET}")
                 else:
-                    self.session._stdout.write(f" - {Colors.YELLOW}Need at least 1 human player{Colors.RESET}")
-                self.session._stdout.write(f"\r\n\r\n❯ ")
+                    out.append(f" - {Colors.YELLOW}Need at least 1 human player{Colors.RESET}")
+                out.append("\r\n\r\n❯ ")
+                self.session._stdout.write("".join(out))
             await self.session._stdout.drain()
         except Exception:
             pass
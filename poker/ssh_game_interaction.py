@@ -92,7 +92,7 @@ class GameInteraction:
         """Register a player for the session in the given room."""
         logging.debug(f"Registering player {name} for room")
         
-        existing = next((p for p in room.pm.players if p.name == name), None)
+        existing = room.pm.get_player(name)
         if existing is not None:
             logging.debug(f"Player {name} already exists, using existing player")
             player = existing
@@ -425,7 +425,7 @@ class GameInteraction:
                 # Show waiting message if it's not this player's turn
                 if session_player.name != current_player_name:
                     if current_player_name:
-                        current_player_obj = next((p for p in room.pm.players if p.name == current_player_name), None)
+                        current_player_obj = room.pm.get_player(current_player_name)
                         if current_player_obj and current_player_obj.is_ai:
                             session._stdout.write(f"⏳ Waiting for 🤖 {Colors.CYAN}{current_player_name}{Colors.RESET} to make their move...\r\n")
                         else:
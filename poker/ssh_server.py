@@ -55,8 +55,9 @@ if asyncssh:
             super().__init__(stdin, stdout, stderr, server_state=server_state, username=username)
 
     class _RoomSSHServer(asyncssh.SSHServer):
-        def __init__(self):
-            self.auth_handler = SSHAuthentication()
+        def __init__(self, auth_handler: Optional[SSHAuthentication] = None):
+            # The handler is stateless, so all connections can share one
+            self.auth_handler = auth_handler if auth_handler is not None else SSHAuthentication()
         
         def connection_made(self, conn):
             """Called when a new SSH connection is established."""
@@ -147,6 +148,7 @@ class SSHServer:
 
         # Use a persistent host key file
         host_key_path = Path(__file__).resolve().parent.parent / "poker_host_key"
+        host_key = None
 
         if not host_key_path.exists():
             try:
@@ -162,9 +164,14 @@ class SSHServer:
                     host_key_path.chmod(0o600)
                 except Exception:
                     pass
+                host_key = key
             except Exception as e:
                 raise RuntimeError(f"Failed to generate host key: {e}")
 
+        # Parse the host key once at startup and hand asyncssh the key object
+        if host_key is None:
+            host_key = asyncssh.read_private_key(str(host_key_path))
+
         # Build server state
         self._server_state = RoomServerState()
 
@@ -231,9 +238,11 @@ class SSHServer:
                 "Click on the HELP button on https://poker.qincai.xyz for detailed instructions.\n\n"                
             )
 
-        # Create the server factory
+        # Create the server factory; every connection shares one auth handler
+        auth_handler = SSHAuthentication()
+
         def server_factory():
-            server = _RoomSSHServer()
+            server = _RoomSSHServer(auth_handler)
             # Set banner on the server instance
             server._banner_message = banner_message
             return server
@@ -242,7 +251,7 @@ class SSHServer:
             server_factory,
             self.host,
             self.port,
-            server_host_keys=[str(host_key_path)],
+            server_host_keys=[host_key],
             session_factory=session_factory,
             reuse_address=True,
         )
@@ -260,11 +269,9 @@ class SSHServer:
 if __name__ == "__main__":
     import argparse
 
-    logging.basicConfig(level=logging.INFO)
-    
-    # Suppress AsyncSSH's verbose window change messages
-    asyncssh_logger = logging.getLogger('asyncssh')
-    asyncssh_logger.setLevel(logging.WARNING)
+    from poker.logging_setup import configure as configure_logging
+
+    configure_logging()
     parser = argparse.ArgumentParser(description="Run a room-aware SSH server for Poker-over-SSH")
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", default=22222, type=int, help="Port to bind to")
@@ -10,6 +10,7 @@ from typing import Optional, Dict, Any
 from poker.terminal_ui import Colors
 from poker.rooms import RoomManager
 from poker.server_info import get_server_info
+from poker.database import is_guest_username
 
 
 class RoomSession:
@@ -131,13 +132,7 @@ class RoomSession:
 
     def _is_guest_account(self, username: str) -> bool:
         """Check if username is a guest account (guest, guest1, guest2, etc.)."""
-        if username == "guest":
-            return True
-        if username.startswith("guest") and len(username) > 5:
-            # Check if the part after "guest" is numeric
-            suffix = username[5:]
-            return suffix.isdigit()
-        return False
+        return is_guest_username(username)
 
     def _check_guest_reset_notice(self, username: str) -> Optional[str]:
         """Check if guest account was recently reset and return notice message."""
@@ -5,6 +5,8 @@ This keeps presentation logic out of the engine so SSH sessions can call
 `TerminalUI.render(game_state)` to get a colorized string to send to clients.
 """
 
+from poker.game_engine import RANK_LABELS, make_deck
+
 # ANSI color codes
 class Colors:
     RED = '\033[31m'
@@ -44,8 +46,7 @@ SUIT_COLORS = {
 def card_str(card):
     """Format a single card as ASCII art lines."""
     r, s = card
-    names = {11: 'J', 12: 'Q', 13: 'K', 14: 'A'}
-    rank = names.get(r, str(r))
+    rank = RANK_LABELS[r]
     symbol = SUIT_SYMBOLS.get(s, s)
     color = SUIT_COLORS.get(s, Colors.WHITE)
 
@@ -64,23 +65,20 @@ def card_str(card):
     return [top, mid1, mid2, mid3, bot]
 
 
+# Every view redraws the same 52 cards, so render each one once up front
+_CARD_ART = {card: tuple(card_str(card)) for card in make_deck()}
+
+
 def cards_horizontal(cards):
     """Render multiple cards side-by-side horizontally."""
     if not cards:
         return ""
     
     # Get all card lines
-    card_lines = [card_str(card) for card in cards]
+    card_lines = [_CARD_ART.get(card) or card_str(card) for card in cards]
     
     # Combine each line horizontally with a space between cards
-    result_lines = []
-    for line_idx in range(5):  # Each card has 5 lines
-        line_parts = []
-        for card_line in card_lines:
-            line_parts.append(card_line[line_idx])
-        result_lines.append(" ".join(line_parts))
-    
-    return "\n".join(result_lines)
+    return "\n".join(" ".join(line_parts) for line_parts in zip(*card_lines))
 
 
 class TerminalUI:
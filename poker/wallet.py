@@ -97,17 +97,13 @@ class WalletManager:
             if abs(change) > 50000:  # Alert on changes larger than $50,000
                 logging.warning(f"LARGE BALANCE CHANGE detected for {player_name}: ${change:+}. Old: ${old_balance}, New: ${new_balance}")
             
-            # Update database with cached values
-            self.db.update_wallet_balance(
+            # Update database with cached values, counting the actual balance
+            # change (not session total) towards game stats in the same write
+            self.db.finalize_hand(
                 player_name, new_balance, transaction_type,
                 f"{description_prefix}: ${old_balance} -> ${new_balance}"
             )
             
-            # Update game stats with the actual balance change (not session total)
-            balance_change = new_balance - old_balance
-            if balance_change != 0:
-                self.db.update_game_stats(player_name, balance_change)
-            
             # Reset session tracking after save
             wallet['session_winnings'] = 0
             wallet['session_start_balance'] = new_balance
@@ -52,12 +52,7 @@ def database_manager(tmp_path, monkeypatch):
 
     yield manager
 
-    connection = getattr(manager._local, "connection", None)
-    if connection is not None:
-        try:
-            connection.close()
-        except Exception:
-            pass
+    manager.close_all()
 
 
 @pytest.fixture
@@ -0,0 +1,495 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+import pytest
+from openai import APIConnectionError, APIStatusError, APITimeoutError, BadRequestError
+
+from poker import ai as ai_module
+from poker.ai import PokerAI, _PREFLOP_TABLE, _JsonObjectScanner, _betting_context, _classify_api_error, _last_int
+from poker.player import Player
+
+
+@pytest.fixture
+def simple_ai(monkeypatch):
+    """PokerAI without an API client."""
+
+    monkeypatch.delenv("AI_API_KEY", raising=False)
+    monkeypatch.delenv("AI_API_BASE_URL", raising=False)
+    monkeypatch.delenv("AI_STRUCTURED_OUTPUT", raising=False)
+    monkeypatch.setattr(ai_module, "_structured_output", None)
+    monkeypatch.setattr(ai_module, "_decision_cache", OrderedDict())
+    monkeypatch.setattr(ai_module, "_connection_probe", None)
+
+    def _factory(hand, chips=200):
+        player = Player("AI_Test", is_ai=True, chips=chips)
+        player.hand = list(hand)
+        return PokerAI(player)
+
+    return _factory
+
+
+def test_preflop_table_covers_every_rank_pair():
+    assert len(_PREFLOP_TABLE) == 13 * 14 // 2
+    assert _PREFLOP_TABLE[(9, 9)][0] == "raise"
+    assert _PREFLOP_TABLE[(3, 12)][0] == "raise"
+    assert _PREFLOP_TABLE[(4, 11)][0] == "call"
+    assert _PREFLOP_TABLE[(2, 7)][0] == "fold"
+
+
+def test_betting_context_falls_back_to_bets():
+    assert _betting_context({"bets": {"AI_Test": 5, "bob": 20, "carol": 10}}, "AI_Test") == (20, 5, 15)
+    assert _betting_context({"bets": {"bob": 20}}, "AI_Test") == (20, 0, 20)
+    assert _betting_context({}, "AI_Test") == (0, 0, 0)
+
+
+def test_betting_context_uses_round_bets_and_current_bet():
+    state = {
+        "bets": {"AI_Test": 40, "bob": 60},
+        "round_bets": {"AI_Test": 10, "bob": 30},
+        "current_bet": 30,
+    }
+    assert _betting_context(state, "AI_Test") == (30, 10, 20)
+
+
+@pytest.mark.parametrize(
+    "hand, expected",
+    [
+        ([(8, "h"), (8, "s")], {"action": "raise", "amount": 30}),
+        ([(13, "h"), (4, "s")], {"action": "raise", "amount": 25}),
+        ([(3, "d"), (11, "c")], {"action": "call", "amount": 10}),
+        ([(2, "d"), (7, "c")], {"action": "fold", "amount": 0}),
+    ],
+)
+def test_simple_decision_preflop(simple_ai, hand, expected):
+    ai = simple_ai(hand)
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+    assert ai._simple_decision(state) == expected
+
+
+def _chunk(text):
+    delta = type("Delta", (), {"content": text})()
+    choice = type("Choice", (), {"delta": delta})()
+    return type("Chunk", (), {"choices": [choice]})()
+
+
+class _FakeStream:
+    def __init__(self, pieces, events):
+        self.pieces = list(pieces)
+        self.events = events
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent >= len(self.pieces):
+            raise StopAsyncIteration
+        self.sent += 1
+        return _chunk(self.pieces[self.sent - 1])
+
+    async def close(self):
+        self.closed = True
+
+
+class _SchemaRejected(BadRequestError):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+def _api_error(cls, status=None, headers=None):
+    """Instance of an openai error class without building real HTTP objects."""
+    error = cls.__new__(cls)
+    Exception.__init__(error, "error page")
+    if status is not None:
+        error.response = type("Response", (), {"status_code": status, "headers": headers or {}})()
+    return error
+
+
+class _FakeCompletions:
+    def __init__(self, pieces, events, reject_schema=False):
+        self.pieces = pieces
+        self.events = events
+        self.reject_schema = reject_schema
+        self.streams = []
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.events.append("request")
+        self.requests.append(kwargs)
+        assert kwargs.get("stream") is True
+        if self.reject_schema and "response_format" in kwargs:
+            raise _SchemaRejected("response_format unsupported")
+        stream = _FakeStream(self.pieces, self.events)
+        self.streams.append(stream)
+        return stream
+
+
+def _fake_client(content, events, reject_schema=False):
+    pieces = [content] if isinstance(content, str) else content
+    chat = type("Chat", (), {"completions": _FakeCompletions(pieces, events, reject_schema)})()
+    return type("Client", (), {"chat": chat})()
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_has_no_artificial_delay(simple_ai, monkeypatch):
+    events = []
+
+    async def _sleep(_delay):
+        events.append("sleep")
+
+    monkeypatch.setattr(ai_module.asyncio, "sleep", _sleep)
+
+    ai = simple_ai([(14, "h"), (14, "s")])
+    ai.client = _fake_client('{"action": "raise", "amount": 40}', events)
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    assert await ai._ai_decision(state) == {"action": "raise", "amount": 40}
+    assert events == ["request"]
+    assert ai._simple_decision(state) == {"action": "raise", "amount": 30}
+    assert events == ["request"]
+
+
+@pytest.mark.parametrize(
+    "bets, chips, expected",
+    [
+        ({"AI_Test": 10, "bob": 10}, 200, {"action": "call", "amount": 0}),
+        ({"AI_Test": 0, "bob": 50}, 20, {"action": "fold", "amount": 0}),
+    ],
+)
+def test_simple_decision_forced_lines(simple_ai, bets, chips, expected):
+    ai = simple_ai([(2, "d"), (7, "c")], chips=chips)
+    state = {"community": [], "bets": bets, "pot": 20, "players": []}
+    assert ai._simple_decision(state) == expected
+
+
+@pytest.mark.parametrize(
+    "hand, expected",
+    [
+        ([(9, "h"), (4, "s")], {"action": "raise", "amount": 35}),
+        ([(14, "h"), (4, "s")], {"action": "raise", "amount": 35}),
+        # Five-high on an ace-queen board has less equity than the pot odds
+        ([(3, "h"), (5, "s")], {"action": "fold", "amount": 0}),
+    ],
+)
+def test_simple_decision_postflop_pair(simple_ai, hand, expected):
+    ai = simple_ai(hand)
+    community = [(9, "d"), (14, "c"), (12, "s")]
+    state = {"community": community, "bets": {"AI_Test": 0, "bob": 10}, "pot": 30, "players": []}
+    assert ai._simple_decision(state) == expected
+
+
+@pytest.mark.asyncio
+async def test_thinking_callback_sync_and_async(simple_ai):
+    calls = []
+
+    async def async_cb(name, is_thinking):
+        calls.append(("async", name, is_thinking))
+
+    def sync_cb(name, is_thinking):
+        calls.append(("sync", name, is_thinking))
+
+    def broken_cb(name, is_thinking):
+        raise RuntimeError("session closed")
+
+    ai = simple_ai([(2, "d"), (7, "c")])
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    ai.thinking_callback = async_cb
+    await ai.decide_action(state)
+    ai.thinking_callback = sync_cb
+    await ai.decide_action(state)
+    assert calls == [
+        ("async", "AI_Test", True), ("async", "AI_Test", False),
+        ("sync", "AI_Test", True), ("sync", "AI_Test", False),
+    ]
+
+    ai.thinking_callback = broken_cb
+    assert await ai.decide_action(state) == {"action": "fold", "amount": 0}
+    ai.thinking_callback = "not callable"
+    assert ai.thinking_callback is None
+
+
+def test_validate_decision_canonicalizes_action(simple_ai):
+    ai = simple_ai([(2, "d"), (7, "c")], chips=50)
+    parsed = "".join(["RA", "ISE"])
+
+    decision = ai._validate_decision({"action": parsed, "amount": 80}, {})
+    assert decision == {"action": "raise", "amount": 50}
+    assert decision["action"] is ai_module._VALID_ACTIONS["raise"]
+    assert ai._validate_decision({"action": "shove", "amount": -5}, {}) == {"action": "fold", "amount": 0}
+
+
+def test_ai_seats_share_one_client(monkeypatch):
+    monkeypatch.setenv("AI_API_KEY", "test-key")
+    monkeypatch.setenv("AI_API_BASE_URL", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(ai_module, "_shared_client", None)
+    monkeypatch.setattr(ai_module, "_shared_client_key", None)
+
+    first = PokerAI(Player("bot1", is_ai=True))
+    second = PokerAI(Player("bot2", is_ai=True))
+    assert first.client is not None
+    assert first.client is second.client
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("I raise to 40", 40),
+        ("raise 15, maybe 120 later.", 120),
+        ("raise 7", 7),
+        ("42", 42),
+        ("just raise", None),
+        ("", None),
+    ],
+)
+def test_last_int(text, expected):
+    assert _last_int(text) == expected
+
+
+class _FakeModels:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def list(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return []
+
+
+@pytest.mark.asyncio
+async def test_connection_probe_lists_models_and_is_shared(simple_ai):
+    client = _fake_client("", [])
+    client.models = _FakeModels()
+    first, second = simple_ai([(2, "h"), (3, "s")]), simple_ai([(4, "h"), (5, "s")])
+    first.client = second.client = client
+
+    assert await first.test_connection() is True
+    assert await second.test_connection() is True
+    assert client.models.calls == 1
+    assert client.chat.completions.requests == []
+
+
+@pytest.mark.asyncio
+async def test_connection_probe_reports_failure(simple_ai, capsys):
+    ai = simple_ai([(2, "h"), (3, "s")])
+    ai.client = _fake_client("", [])
+    ai.client.models = _FakeModels(error=_api_error(APIConnectionError))
+
+    assert await ai.test_connection() is False
+    assert "Cannot connect" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (_api_error(APITimeoutError), "timeout"),
+        (asyncio.TimeoutError(), "timeout"),
+        (_api_error(APIConnectionError), "connection"),
+        (_api_error(APIStatusError, 403, {"cf-ray": "8a1b2c"}), "blocked"),
+        (_api_error(APIStatusError, 522, {"cf-ray": "8a1b2c"}), "blocked"),
+        (_api_error(APIStatusError, 403), "other"),
+        (_api_error(APIStatusError, 429, {"cf-ray": "8a1b2c"}), "other"),
+        (RuntimeError("connection timeout from cloudflare"), "other"),
+    ],
+)
+def test_classify_api_error(error, expected):
+    assert _classify_api_error(error) == expected
+
+
+@pytest.mark.asyncio
+async def test_close_shared_client_closes_and_forgets_client(monkeypatch):
+    closed = []
+
+    class _Client:
+        async def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(ai_module, "_shared_client", _Client())
+    monkeypatch.setattr(ai_module, "_shared_client_key", ("k", "u", 5.0))
+
+    await ai_module.close_shared_client()
+    await ai_module.close_shared_client()
+    assert closed == [True]
+    assert ai_module._shared_client is None
+
+
+def test_json_object_scanner_handles_split_chunks():
+    scanner = _JsonObjectScanner()
+    assert scanner.feed("Sure! {\"action\": \"ra") is None
+    assert scanner.feed("ise\", \"note\": \"a } in {text\\\"\", ") is None
+    assert scanner.feed("\"amount\": 30} trailing") == (
+        '{"action": "raise", "note": "a } in {text\\"", "amount": 30}'
+    )
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_stops_streaming_once_json_is_complete(simple_ai):
+    events = []
+    ai = simple_ai([(14, "h"), (14, "s")])
+    pieces = ['{"action": ', '"call", "amount"', ': 0}', " because", " aces", " are", " good"]
+    ai.client = _fake_client(pieces, events)
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    assert await ai._ai_decision(state) == {"action": "call", "amount": 0}
+    stream = ai.client.chat.completions.streams[0]
+    assert stream.sent == 3
+    assert stream.closed is True
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_falls_back_to_text_without_json(simple_ai):
+    ai = simple_ai([(14, "h"), (14, "s")])
+    ai.client = _fake_client(["I will ", "fold here"], [])
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    assert await ai._ai_decision(state) == {"action": "fold", "amount": 0}
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_requests_structured_output(simple_ai):
+    ai = simple_ai([(14, "h"), (14, "s")])
+    ai.client = _fake_client('{"action": "call", "amount": 0}', [])
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    assert await ai._ai_decision(state) == {"action": "call", "amount": 0}
+    request = ai.client.chat.completions.requests[0]
+    assert request["response_format"]["json_schema"]["schema"]["required"] == ["action", "amount"]
+
+
+@pytest.mark.asyncio
+async def test_ai_model_is_read_once_at_setup(simple_ai, monkeypatch):
+    monkeypatch.setenv("AI_MODEL", "table-model")
+    ai = simple_ai([(14, "h"), (14, "s")])
+    monkeypatch.setenv("AI_MODEL", "changed-later")
+    ai.client = _fake_client('{"action": "call", "amount": 0}', [])
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    await ai._ai_decision(state)
+    assert ai.client.chat.completions.requests[0]["model"] == "table-model"
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_drops_structured_output_when_rejected(simple_ai):
+    ai = simple_ai([(14, "h"), (14, "s")])
+    ai.client = _fake_client('{"action": "call", "amount": 0}', [], reject_schema=True)
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    assert await ai._ai_decision(state) == {"action": "call", "amount": 0}
+    state["bets"] = {"AI_Test": 0, "bob": 20}
+    assert await ai._ai_decision(state) == {"action": "call", "amount": 0}
+    requests = ai.client.chat.completions.requests
+    assert ["response_format" in r for r in requests] == [True, False, False]
+
+
+def test_poker_prompt_is_compact_state_line(simple_ai):
+    ai = simple_ai([(14, "s"), (10, "d")])
+    state = {
+        "community": [(2, "h"), (13, "c"), (9, "s")],
+        "bets": {"AI_Test": 5, "bob": 20},
+        "pot": 40,
+        "players": [("AI_Test",), ("bob",), ("carol",)],
+    }
+    assert ai._create_poker_prompt(state) == (
+        '{"h":"As Td","c":"2h Kc 9s","p":40,"cb":20,"mb":5,"ca":15,"ch":200,"n":3}'
+    )
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_cache_single_flight(simple_ai):
+    ai = simple_ai([(14, "h"), (13, "s")])
+    ai.client = _fake_client('{"action": "raise", "amount": 40}', [])
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    results = await asyncio.gather(ai._ai_decision(state), ai._ai_decision(dict(state)))
+    assert results == [{"action": "raise", "amount": 40}] * 2
+    assert len(ai.client.chat.completions.requests) == 1
+
+    # Same cards and bets with a similar pot still hit the cache
+    assert await ai._ai_decision(dict(state, pot=12)) == {"action": "raise", "amount": 40}
+    assert len(ai.client.chat.completions.requests) == 1
+
+    # A different bet to face is a different decision
+    await ai._ai_decision(dict(state, bets={"AI_Test": 0, "bob": 30}))
+    assert len(ai.client.chat.completions.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_ai_decision_cache_skips_failed_requests(simple_ai):
+    ai = simple_ai([(14, "h"), (13, "s")])
+    ai.client = _fake_client("", [])
+    state = {"community": [], "bets": {"AI_Test": 0, "bob": 10}, "pot": 10, "players": []}
+
+    await ai._ai_decision(state)
+    assert ai_module._decision_cache == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "hand, bets, pot, expected",
+    [
+        # Made straight: raise without asking the model
+        ([(10, "h"), (11, "s")], {"AI_Test": 0, "bob": 10}, 30, {"action": "raise", "amount": 50}),
+        # High card facing a pot-sized bet: fold
+        ([(2, "h"), (4, "s")], {"AI_Test": 0, "bob": 40}, 40, {"action": "fold", "amount": 0}),
+    ],
+)
+async def test_decide_action_skips_model_for_clear_spots(simple_ai, hand, bets, pot, expected):
+    ai = simple_ai(hand)
+    ai.client = _fake_client('{"action": "call", "amount": 0}', [])
+    community = [(7, "d"), (8, "c"), (9, "s")]
+    state = {"community": community, "bets": bets, "pot": pot, "players": []}
+
+    assert await ai.decide_action(state) == expected
+    assert ai.client.chat.completions.requests == []
+
+
+@pytest.mark.asyncio
+async def test_decide_action_asks_model_for_marginal_spots(simple_ai):
+    ai = simple_ai([(7, "h"), (3, "s")])
+    ai.client = _fake_client('{"action": "call", "amount": 10}', [])
+    state = {"community": [(7, "d"), (8, "c"), (9, "s")], "bets": {"AI_Test": 0, "bob": 10}, "pot": 30, "players": []}
+
+    assert await ai.decide_action(state) == {"action": "call", "amount": 10}
+    assert len(ai.client.chat.completions.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_strength_decision_uses_equity_against_pot_odds(simple_ai):
+    community = [(7, "d"), (8, "c"), (9, "s")]
+    bets = {"AI_Test": 0, "bob": 10}
+    players = [("AI_Test", 100, "active", True), ("bob", 90, "active", False)]
+
+    strong = simple_ai([(9, "h"), (3, "s")])
+    state = {"community": community, "bets": bets, "pot": 30, "players": players}
+    assert strong._strength_decision(state) == {"action": "raise", "amount": 35}
+
+    weak = simple_ai([(6, "h"), (2, "s")])
+    assert weak._strength_decision(state) == {"action": "call", "amount": 10}
+    state["pot"] = 10
+    assert weak._strength_decision(state) == {"action": "fold", "amount": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("client", [None, object()])
+async def test_decide_action_judgement_call_rolls_out_once_off_loop(simple_ai, monkeypatch, client):
+    rollouts = []
+    real_estimate = ai_module.estimate_equity
+
+    def counting_estimate(*args):
+        rollouts.append(threading.get_ident())
+        return real_estimate(*args)
+
+    monkeypatch.setattr(ai_module, "estimate_equity", counting_estimate)
+    # Same marginal spot as test_decide_action_asks_model_for_marginal_spots,
+    # but with no model (or a broken one) to ask
+    ai = simple_ai([(7, "h"), (3, "s")])
+    ai.client = client
+    state = {"community": [(7, "d"), (8, "c"), (9, "s")], "bets": {"AI_Test": 0, "bob": 10}, "pot": 30, "players": []}
+
+    assert await ai.decide_action(state) == {"action": "raise", "amount": 35}
+    assert len(rollouts) == 1
+    assert rollouts[0] != threading.get_ident()
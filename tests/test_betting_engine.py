@@ -1,6 +1,6 @@
 import pytest
 
-from poker.betting_engine import BettingEngine, is_already_bet
+from poker.betting_engine import BettingEngine
 from poker.game_engine import GameEngine
 
 
@@ -12,11 +12,6 @@ class DummyManager:
         self.synced.append(name)
 
 
-def test_is_already_bet():
-    assert is_already_bet(10, 10) is True
-    assert is_already_bet(5, 10) is False
-
-
 @pytest.mark.asyncio
 async def test_betting_round_basic_flow(make_player):
     players = [
@@ -45,6 +40,66 @@ async def test_betting_round_basic_flow(make_player):
     assert any("folded" in entry for entry in engine.action_history)
 
 
+def test_apply_contribution_caps_at_stack_and_defers_sync(make_player):
+    human = make_player("human", chips=30)
+    engine = GameEngine([human])
+    engine.reset_round()
+    manager = DummyManager()
+    betting = BettingEngine(engine, player_manager=manager)
+
+    assert betting._apply_contribution(human, 10) == 10
+    assert betting._apply_contribution(human, 50) == 20
+    assert human.chips == 0
+    assert engine.bets["human"] == engine.round_bets["human"] == engine.pot == 30
+
+    # Wallet syncs are deferred and collapsed to one per player
+    assert manager.synced == []
+    betting._flush_wallet_syncs()
+    assert manager.synced == ["human"]
+
+
+@pytest.mark.asyncio
+async def test_betting_round_syncs_each_wallet_once(make_player):
+    players = [
+        make_player("alice", chips=100, actions=[{"action": "bet", "amount": 10}, {"action": "call", "amount": 0}]),
+        make_player("bob", chips=100, actions=[{"action": "raise", "amount": 30}]),
+        make_player("bot", chips=100, actions=[{"action": "call", "amount": 0}], is_ai=True),
+    ]
+    engine = GameEngine(players)
+    engine.reset_round()
+    manager = DummyManager()
+
+    await BettingEngine(engine, player_manager=manager).betting_round()
+
+    assert sorted(manager.synced) == ["alice", "bob"]
+
+
+@pytest.mark.asyncio
+async def test_public_state_tracks_current_bet(make_player):
+    seen = []
+
+    def record(action):
+        def _act(state):
+            seen.append((state["current_bet"], max(state["round_bets"].values())))
+            return action
+        return _act
+
+    players = [
+        make_player("alice", chips=100, actions=[record({"action": "bet", "amount": 10}), record({"action": "call", "amount": 0})]),
+        make_player("bob", chips=100, actions=[record({"action": "raise", "amount": 30})]),
+        make_player("carol", chips=100, actions=[record({"action": "call", "amount": 0})]),
+    ]
+    engine = GameEngine(players)
+    engine.reset_round()
+
+    await BettingEngine(engine).betting_round()
+
+    assert [current for current, _ in seen] == [0, 10, 30, 30]
+    assert all(current == highest for current, highest in seen)
+    assert engine.current_bet == 30
+    assert engine.pot == 90
+
+
 @pytest.mark.asyncio
 async def test_betting_round_rebuy_and_elimination(make_player):
     rebuy_player = make_player("rebuyer", chips=0, actions=[{"action": "fold", "amount": 0}])
@@ -172,6 +227,24 @@ async def test_invalid_bet_when_call_needed_triggers_call(make_player):
     assert any("(invalid bet)" in entry for entry in engine.action_history)
 
 
+@pytest.mark.asyncio
+async def test_invalid_bet_short_stack_goes_all_in(make_player):
+    bettor = make_player("bettor", chips=100, actions=[{"action": "bet", "amount": 50}])
+    short = make_player("short", chips=30, actions=[{"action": "bet", "amount": 0}])
+
+    engine = GameEngine([bettor, short])
+    engine.reset_round()
+
+    betting = BettingEngine(engine)
+
+    await betting.betting_round()
+
+    assert engine.pot == 80
+    assert short.chips == 0
+    assert short.state == "all-in"
+    assert "short called $30 (all-in)" in engine.action_history
+
+
 @pytest.mark.asyncio
 async def test_check_forced_fold_when_no_min_bet(make_player):
     player1 = make_player("p1", chips=15, actions=[{"action": "check", "amount": 0}])
@@ -206,7 +279,7 @@ async def test_bet_below_minimum_with_checks_allowed_is_treated_as_check(make_pl
 
 
 @pytest.mark.asyncio
-async def test_is_already_bet_branch_logs_check(make_player):
+async def test_rebet_of_own_amount_calls_the_raise(make_player):
     p1 = make_player(
         "p1",
         chips=100,
@@ -225,7 +298,9 @@ async def test_is_already_bet_branch_logs_check(make_player):
 
     await betting.betting_round()
 
-    assert any("already at $" in entry for entry in engine.action_history)
+    # Re-betting what p1 already has in is not a raise: p1 owes the raise
+    assert "p1 called $10 (amount $10 insufficient for raise)" in engine.action_history
+    assert engine.round_bets == {"p1": 20, "p2": 20, "p3": 20}
 
 
 @pytest.mark.asyncio
@@ -337,3 +412,19 @@ async def test_rebuy_when_no_max_limit(make_player):
 
     assert rebuyer.chips == 50
     assert rebuyer.rebuys == 1
+
+
+@pytest.mark.asyncio
+async def test_non_int_amount_is_coerced(make_player):
+    bettor = make_player("bettor", chips=100, actions=[{"action": "bet", "amount": "10"}])
+    caller = make_player("caller", chips=100, actions=[{"action": "call", "amount": 10.0}])
+
+    engine = GameEngine([bettor, caller])
+    engine.reset_round()
+
+    betting = BettingEngine(engine)
+
+    await betting.betting_round()
+
+    assert engine.pot == 20
+    assert "bettor bet $10" in engine.action_history
@@ -1,4 +1,9 @@
-from poker.database import DatabaseManager, get_database, init_database
+import sqlite3
+import threading
+
+import pytest
+
+from poker.database import DatabaseManager, get_database, init_database, is_guest_username
 
 
 def test_database_wallet_and_transactions(database_manager):
@@ -63,6 +68,13 @@ def test_database_admin_features(database_manager):
     assert db.claim_bonus("alice", amount=150) is True
     can_claim, _ = db.can_claim_bonus("alice")
     assert can_claim is False
+    assert db.claim_bonus("alice", amount=150) is False
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE daily_bonuses SET last_bonus_time = last_bonus_time - 3600 WHERE player_name = 'alice'")
+    assert db.claim_bonus("alice", amount=150) is True
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT bonuses_claimed_today FROM daily_bonuses WHERE player_name = 'alice'")
+        assert cursor.fetchone()[0] == 2
 
     db.mark_ai_broke("bot")
     assert db.can_ai_respawn("bot") is False
@@ -97,9 +109,543 @@ def test_database_singleton_helpers(tmp_path, monkeypatch):
         assert isinstance(get_database(), DatabaseManager)
         wallet = manager.get_wallet("singleton")
         assert wallet["player_name"] == "singleton"
+        assert init_database(str(path)) is manager
+        assert get_database() is manager
     finally:
         try:
             manager._get_connection().close()
         except Exception:
             pass
         monkeypatch.setattr("poker.database._db_manager", None, raising=False)
+
+
+def test_get_wallet_creates_once(database_manager):
+    db = database_manager
+
+    created = db.get_wallet("carol")
+    assert created["balance"] == 500
+    assert db.get_wallet("carol") == created
+
+    transactions = db.get_player_transactions("carol")
+    assert [t["transaction_type"] for t in transactions] == ["WALLET_CREATED"]
+    assert transactions[0]["balance_after"] == 500
+
+
+def test_get_wallet_cache(database_manager):
+    db = database_manager
+    wallet = db.get_wallet("erin")
+    wallet["balance"] = -1  # Callers get a copy, not the cached dict
+
+    # An outside write is not seen while the cached entry is fresh
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE wallets SET balance = 42 WHERE player_name = 'erin'")
+    assert db.get_wallet("erin")["balance"] == 500
+
+    # Writes through the manager drop the entry
+    db.update_game_stats("erin", 10)
+    assert db.get_wallet("erin")["balance"] == 42
+    db.WALLET_CACHE_TTL = 0
+    db.update_wallet_balance("erin", 99)
+    assert db.get_wallet("erin")["balance"] == 99
+
+    # With no TTL every read goes back to the table
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE wallets SET balance = 7 WHERE player_name = 'erin'")
+    assert db.get_wallet("erin")["balance"] == 7
+
+
+def test_get_wallet_does_not_cache_a_row_read_before_a_write(database_manager):
+    db = database_manager
+    db.get_wallet("gina")
+    db._forget_wallet("gina")
+    store = db._cache_wallet
+
+    def write_between_read_and_store(wallet, generation):
+        # Another thread commits a write after our SELECT, before we cache
+        with db.get_cursor() as cursor:
+            cursor.execute("UPDATE wallets SET balance = 77 WHERE player_name = 'gina'")
+        db._forget_wallet("gina")
+        return store(wallet, generation)
+
+    db._cache_wallet = write_between_read_and_store
+    assert db.get_wallet("gina")["balance"] == 500  # read before the write
+    del db._cache_wallet
+
+    assert "gina" not in db._wallet_cache
+    assert db.get_wallet("gina")["balance"] == 77
+
+
+def test_update_wallet_balance_logs_change(database_manager):
+    db = database_manager
+
+    # Unknown player: the wallet is created first and the change is logged
+    # against its starting balance
+    assert db.update_wallet_balance("dave", 650, "GAME_RESULT", "won", round_id="r1")
+    assert db.update_wallet_balance("dave", 600, "GAME_RESULT", "lost")
+    assert db.get_wallet("dave")["balance"] == 600
+
+    results = [t for t in db.get_player_transactions("dave") if t["transaction_type"] == "GAME_RESULT"]
+    changes = sorted((t["balance_before"], t["balance_after"], t["amount"]) for t in results)
+    assert changes == [(500, 650, 150), (650, 600, -50)]
+    assert db.audit_player_transactions("dave")["issues"] == []
+
+    # A GAME_RESULT that changes nothing is not logged; other types still are
+    assert db.update_wallet_balance("dave", 600, "GAME_RESULT", "even")
+    assert db.update_wallet_balance("dave", 600, "MANUAL_SAVE", "even")
+    types = [t["transaction_type"] for t in db.get_player_transactions("dave")]
+    assert types.count("GAME_RESULT") == 2
+    assert types.count("MANUAL_SAVE") == 1
+    assert db.update_wallet_balance("newbie", 500, "GAME_RESULT")
+    assert [t["transaction_type"] for t in db.get_player_transactions("newbie")] == ["WALLET_CREATED"]
+
+
+def test_finalize_hand_updates_balance_stats_and_log(database_manager):
+    db = database_manager
+    db.get_wallet("ivy")
+
+    assert db.finalize_hand("ivy", 560, description="won", round_id="r1")
+    assert db.finalize_hand("ivy", 520, description="lost")
+
+    wallet = db.get_wallet("ivy")
+    assert (wallet["balance"], wallet["games_played"]) == (520, 2)
+    assert (wallet["total_winnings"], wallet["total_losses"]) == (60, 40)
+    amounts = sorted(t["amount"] for t in db.get_player_transactions("ivy")
+                     if t["transaction_type"] == "GAME_RESULT")
+    assert amounts == [-40, 60]
+
+
+def test_log_action_is_written_behind_in_batches(database_manager):
+    db = database_manager
+    db.get_wallet("alice")
+
+    for amount in range(5):
+        assert db.log_action("alice", "room1", "BET", amount) == 0
+    # No wallet, so this row violates the foreign key; it must not take the
+    # rest of its batch down with it
+    db.log_action("nobody", "room1", "BET", 99)
+    db.flush()
+
+    assert db._action_queue.unfinished_tasks == 0
+    assert sorted(a["amount"] for a in db.get_player_actions("alice")) == [0, 1, 2, 3, 4]
+    assert db.get_player_actions("nobody") == []
+
+
+def _flush_within(db, seconds=5.0):
+    flusher = threading.Thread(target=db.flush, daemon=True)
+    flusher.start()
+    flusher.join(seconds)
+    return not flusher.is_alive()
+
+
+def test_action_writer_survives_bad_rows(database_manager):
+    db = database_manager
+    db.get_wallet("alice")
+
+    # Too big for an SQLite INTEGER: OverflowError, not sqlite3.Error
+    db.log_action("alice", "room1", "BET", 2 ** 70)
+    assert _flush_within(db)
+    db.log_action("alice", "room1", "BET", 3)
+    assert _flush_within(db)
+    assert [a["amount"] for a in db.get_player_actions("alice")] == [3]
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_action_writer_is_restarted(database_manager, monkeypatch):
+    db = database_manager
+    db.get_wallet("alice")
+    write = db._write_actions
+
+    def die_once(rows):
+        monkeypatch.setattr(db, "_write_actions", write)
+        raise SystemExit
+
+    monkeypatch.setattr(db, "_write_actions", die_once)
+    db.log_action("alice", "room1", "BET", 1)
+    db._action_writer.join(5)
+    assert not db._action_writer.is_alive()
+
+    db.log_action("alice", "room1", "BET", 2)
+    assert _flush_within(db)
+    assert [a["amount"] for a in db.get_player_actions("alice")] == [2]
+
+
+def test_bulk_logging(database_manager):
+    db = database_manager
+    db.get_wallet("alice")
+
+    assert db.log_actions_bulk([
+        ("alice", "room1", "BET", 10, "r1", "flop", None),
+        ("alice", "room1", "CALL", 20, "r1", "turn", "late"),
+    ]) == 2
+    assert db.log_transactions_bulk([
+        ("alice", "CUSTOM", 5, 500, 505, "first", None),
+        ("bob", "CUSTOM", -5, 500, 495, "second", "r1"),
+    ]) == 2
+
+    assert {a["action_type"] for a in db.get_player_actions("alice")} == {"BET", "CALL"}
+    assert [t["description"] for t in db.get_player_transactions("bob")
+            if t["transaction_type"] == "CUSTOM"] == ["second"]
+
+
+def test_database_connection_pragmas(database_manager):
+    conn = database_manager._get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 1000
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 268435456
+
+
+def test_ssh_keys_fingerprint_migration(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE ssh_keys (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            public_key TEXT NOT NULL UNIQUE,
+            key_type TEXT NOT NULL,
+            key_comment TEXT,
+            registered_at REAL NOT NULL,
+            last_used REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT INTO ssh_keys (username, public_key, key_type, registered_at) VALUES ('old', 'ssh-rsa OLD', 'rsa', 0)")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(str(path))
+    try:
+        assert db.is_key_authorized("old", "ssh-rsa OLD") is True
+        assert db.get_key_owner("ssh-rsa OLD") == "old"
+        with db.get_cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN SELECT username FROM ssh_keys WHERE key_fingerprint = ? LIMIT 1", (b"x",))
+            assert "idx_ssh_keys_fp" in " ".join(row["detail"] for row in cursor.fetchall())
+    finally:
+        db._get_connection().close()
+
+
+def test_database_indexes_serve_hot_queries(database_manager):
+    with database_manager.get_cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN SELECT player_name, balance FROM wallets ORDER BY balance DESC LIMIT 5")
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+        assert "idx_wallets_balance" in plan
+
+        cursor.execute("EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE player_name = ? ORDER BY timestamp DESC LIMIT 50", ("alice",))
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+    assert "idx_transactions_player_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+    with database_manager.get_cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN SELECT * FROM actions WHERE player_name = ? ORDER BY timestamp DESC LIMIT 50", ("alice",))
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+    assert "idx_actions_player_ts" in plan
+    assert "TEMP B-TREE" not in plan
+
+    with database_manager.get_cursor() as cursor:
+        cursor.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT player_name, balance, total_winnings, total_losses, games_played,
+                   (total_winnings - total_losses) as net_winnings
+            FROM wallets WHERE games_played > 0 ORDER BY total_winnings DESC LIMIT 10
+        """)
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+    assert "COVERING INDEX idx_wallets_winnings" in plan
+    assert "TEMP B-TREE" not in plan
+
+    with database_manager.get_cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN SELECT username FROM guest_accounts WHERE last_activity <= ? ORDER BY last_activity", (0,))
+        plan = " ".join(row["detail"] for row in cursor.fetchall())
+    assert "COVERING INDEX idx_guest_accounts_activity_user" in plan
+
+
+def test_database_stats_single_query(database_manager):
+    db = database_manager
+    assert db.get_database_stats() == {
+        "total_wallets": 0,
+        "total_actions": 0,
+        "total_transactions": 0,
+        "active_players": 0,
+        "total_balance": 0,
+        "suspicious_balances": 0,
+    }
+
+    db.get_wallet("alice")
+    db.get_wallet("bob")
+    db.update_wallet_balance("bob", 60000, "GAME_RESULT", "big win")
+    db.log_action("alice", "room1", "BET", 10)
+
+    stats = db.get_database_stats()
+    assert stats["total_wallets"] == 2
+    assert stats["total_actions"] == 1
+    assert stats["active_players"] == 2
+    assert stats["total_balance"] == 60500
+    assert stats["suspicious_balances"] == 1
+
+
+def test_database_integrity_reports_issues(database_manager):
+    db = database_manager
+    db.get_wallet("whale")
+    db.get_wallet("debtor")
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE wallets SET balance = 200000, total_winnings = 90000 WHERE player_name = 'whale'")
+        cursor.execute("UPDATE wallets SET balance = -5 WHERE player_name = 'debtor'")
+
+    issues = db.check_database_integrity()
+    assert "Suspicious large balance: whale has $200000" in issues
+    assert "Negative balance: debtor has $-5" in issues
+    assert "Extreme stats: whale - Winnings: $90000, Losses: $0, Net: $90000" in issues
+
+
+def test_health_history_roundtrip(database_manager):
+    db = database_manager
+    # Rows written as JSON text before the switch to bytes still parse
+    with db.get_cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO health_history (ts, status, probe, created_at) VALUES (1, 'ok', ?, 0)",
+            ('{"tcp_connect": true}',),
+        )
+    assert db.log_health_entry(2, "warn", {"tcp_connect": True, "ssh_ok": False}) > 0
+
+    history = db.get_health_history()
+    assert [entry["ts"] for entry in history] == [2, 1]
+    assert history[0]["probe"] == {"tcp_connect": True, "ssh_ok": False}
+    assert history[1]["probe"] == {"tcp_connect": True}
+
+
+def test_wallet_stats_cache_tracks_transactions(database_manager):
+    db = database_manager
+    db.log_transactions_bulk([("frank", "GAME_RESULT", 1, 500, 501, "", None)] * 101)
+    db.log_transaction("frank", "GAME_RESULT", -30, 601, 571)
+
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT tx_count, credits_sum, debits_sum FROM wallet_stats_cache WHERE player_name = 'frank'")
+        assert tuple(cursor.fetchone()) == (102, 101, 30)
+    assert "Heavy transaction activity: frank has 102 transactions" in db.check_database_integrity()
+
+    with db.get_cursor() as cursor:
+        cursor.execute("DELETE FROM transactions WHERE player_name = 'frank' AND amount = 1")
+        cursor.execute("SELECT tx_count, credits_sum, debits_sum FROM wallet_stats_cache WHERE player_name = 'frank'")
+        assert tuple(cursor.fetchone()) == (1, 0, 30)
+    assert not any("frank" in issue for issue in db.check_database_integrity())
+
+
+def test_cleanup_old_data_deletes_in_chunks(database_manager):
+    db = database_manager
+    db.get_wallet("gina")
+    db.log_actions_bulk([("gina", "room1", "BET", n, None, None, None) for n in range(7)])
+
+    db.CLEANUP_BATCH_SIZE = 3
+    assert db.cleanup_old_data(-1) == 7
+    assert db.get_player_actions("gina") == []
+
+
+def test_read_cursor_pools_read_only_connections(database_manager):
+    db = database_manager
+    db.get_wallet("hank")
+
+    with db.read_cursor() as cursor:
+        first = cursor.connection
+        with pytest.raises(sqlite3.OperationalError):
+            cursor.execute("DELETE FROM wallets")
+    # Committed writes are visible to the next reader
+    db.update_wallet_balance("hank", 800)
+    with db.read_cursor() as cursor:
+        assert cursor.connection is first
+        cursor.execute("SELECT balance FROM wallets WHERE player_name = 'hank'")
+        assert cursor.fetchone()[0] == 800
+
+    db.READER_POOL_SIZE = 2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(db.get_leaderboard())) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 6
+    assert db._reader_count <= 2
+
+
+def test_bulk_insert_defers_then_enforces_foreign_keys(database_manager):
+    db = database_manager
+    with pytest.raises(sqlite3.IntegrityError):
+        db.log_actions_bulk([("ghost", "room1", "BET", 1, None, None, None)])
+    assert db.get_player_actions("ghost") == []
+
+    # The deferral ended with that transaction
+    conn = db._get_connection()
+    assert conn.execute("PRAGMA defer_foreign_keys").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize(
+    "username, expected",
+    [("guest", True), ("guest7", True), ("guest042", True), ("guests", False),
+     ("guest1a", False), ("xguest1", False), ("Guest1", False), ("", False)],
+)
+def test_is_guest_username(username, expected):
+    assert is_guest_username(username) is expected
+
+
+def test_guest_upserts_keep_history(database_manager):
+    db = database_manager
+    db.update_guest_activity("guest3")
+    with db.get_cursor() as cursor:
+        cursor.execute(
+            "UPDATE guest_accounts SET last_reset = 1, created_at = 2, last_activity = 3 WHERE username = ?",
+            ("guest3",),
+        )
+    db.touch_guest_activity("guest3")
+    db.update_guest_activity("guest3")
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT * FROM guest_accounts WHERE username = ?", ("guest3",))
+        row = cursor.fetchone()
+    assert (row["last_reset"], row["total_resets"], row["created_at"]) == (1, 0, 2)
+    assert row["last_activity"] > 3
+
+    db.claim_bonus("guest3")
+    assert db.reset_guest_account("guest3") is True
+    assert db.reset_guest_account("guest3") is True
+    assert db.get_guest_reset_info("guest3")["total_resets"] == 2
+    assert db.get_wallet("guest3")["balance"] == 500
+
+
+def test_reset_guest_account_rolls_back_on_failure(database_manager):
+    db = database_manager
+    db.get_wallet("guest4")
+    db.log_transaction("guest4", "CUSTOM", 5, 500, 505, "kept")
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            CREATE TRIGGER fail_guest_reset BEFORE INSERT ON guest_accounts
+            BEGIN SELECT RAISE(ABORT, 'boom'); END
+        """)
+
+    assert db.reset_guest_account("guest4") is False
+    assert any(t["description"] == "kept" for t in db.get_player_transactions("guest4"))
+
+
+def test_allocate_guest_username_fills_lowest_gap(database_manager):
+    db = database_manager
+    assert db.allocate_guest_username(max_guest=0) is None
+    assert db.allocate_guest_username(max_guest=3) == "guest1"
+    db.get_wallet("guest2")  # wallet without a guest_accounts row
+    assert db.allocate_guest_username(max_guest=3) == "guest3"
+    assert db.allocate_guest_username(max_guest=3) is None
+
+
+def test_credits_log_old_and_new_balance(database_manager):
+    db = database_manager
+    assert db.add_wallet_funds("carol", 40, "top up")["balance"] == 540
+    assert db.claim_bonus("carol", amount=150) is True
+    assert db.get_wallet("carol")["balance"] == 690
+
+    latest = db.get_player_transactions("carol", limit=2)
+    by_type = {t["transaction_type"]: t for t in latest}
+    assert (by_type["FUNDS_ADDED"]["balance_before"], by_type["FUNDS_ADDED"]["balance_after"]) == (500, 540)
+    assert (by_type["HOURLY_BONUS"]["balance_before"], by_type["HOURLY_BONUS"]["balance_after"]) == (540, 690)
+
+
+def test_sweep_inactive_guests(database_manager):
+    db = database_manager
+    for name in ("guest1", "guest2", "guest3"):
+        db.touch_guest_activity(name)
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE guest_accounts SET last_activity = 0 WHERE username IN ('guest1', 'guest3')")
+    assert sorted(db.sweep_inactive_guests(inactivity_hours=1)) == ["guest1", "guest3"]
+    assert sorted(db.sweep_inactive_guests(inactivity_hours=0)) == ["guest1", "guest2", "guest3"]
+
+
+def test_finished_threads_connections_are_closed(database_manager):
+    db = database_manager
+    opened = []
+
+    def worker():
+        opened.append(db._get_connection())
+        db.get_wallet("dave")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert thread in db._writers
+
+    # The next thread to open a connection closes the finished one's
+    reaper = threading.Thread(target=db._get_connection)
+    reaper.start()
+    reaper.join()
+    assert thread not in db._writers
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+
+
+def test_close_all_closes_connections_and_reopens(database_manager):
+    db = database_manager
+    db.get_wallet("frank")
+    db.log_action("frank", "room", "BET", 5)
+    db.get_player_actions("frank")
+    conn = db._get_connection()
+
+    db.close_all()
+    assert db._writers == {} and db._reader_count == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert len(db.get_player_actions("frank")) == 1
+
+
+def test_bulk_reset_guest_accounts(database_manager, monkeypatch):
+    db = database_manager
+    monkeypatch.setattr(DatabaseManager, "GUEST_RESET_BATCH_SIZE", 2)
+    for name in ("guest1", "guest2", "guest3", "alice"):
+        db.add_wallet_funds(name, 100, "seed")
+        db.log_action(name, "room", "BET", 5)
+    db.reset_guest_account("guest2")
+
+    assert db.bulk_reset_guest_accounts(["guest1", "guest2", "guest3", "guest1", "alice"]) == 3
+    for name in ("guest1", "guest2", "guest3"):
+        assert db.get_wallet(name)["balance"] == 500
+        assert db.get_player_actions(name) == []
+    assert db.get_guest_reset_info("guest2")["total_resets"] == 2
+    assert db.get_guest_reset_info("guest3")["total_resets"] == 1
+    assert db.get_wallet("alice")["balance"] == 600
+    assert len(db.get_player_actions("alice")) == 1
+    assert db.bulk_reset_guest_accounts(["alice"]) == 0
+
+
+def test_credit_wallet_creates_missing_wallet_in_callers_transaction(database_manager):
+    db = database_manager
+    with pytest.raises(RuntimeError):
+        with db.get_cursor() as cursor:
+            assert db._credit_wallet(cursor, "hank", 25, "FUNDS_ADDED") == (500, 525)
+            raise RuntimeError("caller fails after the credit")
+    db._forget_wallet("hank")
+
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM wallets WHERE player_name = 'hank'")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("SELECT COUNT(*) FROM transactions WHERE player_name = 'hank'")
+        assert cursor.fetchone()[0] == 0
+
+    assert db.add_wallet_funds("hank", 25)["balance"] == 525
+    types = [t["transaction_type"] for t in db.get_player_transactions("hank")]
+    assert sorted(types) == ["FUNDS_ADDED", "WALLET_CREATED"]
+
+
+def test_finalize_hand_creates_missing_wallet_in_its_own_transaction(database_manager):
+    db = database_manager
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            CREATE TRIGGER fail_settle BEFORE UPDATE ON wallets
+            BEGIN SELECT RAISE(ABORT, 'boom'); END
+        """)
+    with pytest.raises(sqlite3.IntegrityError):
+        db.finalize_hand("ivy", 650)
+
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM wallets WHERE player_name = 'ivy'")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("SELECT COUNT(*) FROM transactions WHERE player_name = 'ivy'")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("DROP TRIGGER fail_settle")
+
+    assert db.finalize_hand("ivy", 650)
+    wallet = db.get_wallet("ivy")
+    assert (wallet["balance"], wallet["games_played"], wallet["total_winnings"]) == (650, 1, 150)
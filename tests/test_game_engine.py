@@ -20,7 +20,7 @@ def test_game_engine_round_flow(make_player):
     assert len(engine.deck) == 52
     assert engine.pot == 0
     assert engine.community == []
-    assert all(player.hand == [] for player in players)
+    assert all(player.hand == [] and player.hand_mask == 0 for player in players)
 
     drawn = engine.draw(2)
     assert len(drawn) == 2
@@ -28,6 +28,9 @@ def test_game_engine_round_flow(make_player):
 
     engine.deal_hole_cards()
     assert all(len(player.hand) == 2 for player in players)
+    for player in players:
+        (r1, _), (r2, _) = player.hand
+        assert player.hand_mask == (1 << r1) | (1 << r2)
     remaining_after_hole = len(engine.deck)
 
     engine.deal_flop()
@@ -38,11 +41,21 @@ def test_game_engine_round_flow(make_player):
     assert len(engine.community) == 5
     assert len(engine.deck) == remaining_after_hole - 8
 
+    engine.current_bet = 30
     engine.reset_round_bets()
     assert all(value == 0 for value in engine.round_bets.values())
+    assert engine.current_bet == 0
 
     state = engine.get_public_state(include_all_hands=True, current_player_name="alice")
     assert state["community"] == engine.community
     assert state["pot"] == engine.pot
+    assert state["current_bet"] == 0
     assert "all_hands" in state
     assert state["current_player"] == "alice"
+
+    base = engine.get_public_state_base()
+    turn_state = engine.get_public_state_for("bob", base)
+    assert turn_state["community"] is base["community"]
+    assert turn_state["current_player"] == "bob"
+    assert "all_hands" not in turn_state
+    assert turn_state.keys() == state.keys() - {"all_hands"}
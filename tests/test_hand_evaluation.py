@@ -1,6 +1,11 @@
+import itertools
+import random
+
 import pytest
 
-from poker.hand_evaluation import HAND_RANKS, best_hand_from_seven, evaluate_5cards, hand_description
+from poker.hand_evaluation import (
+    HAND_RANKS, _is_straight, best_hand_from_seven, estimate_equity, evaluate_5cards, hand_description,
+)
 
 
 def cards(*cardspecs):
@@ -60,3 +65,62 @@ def test_best_hand_from_seven_selects_best():
 )
 def test_hand_description(rank, tiebreakers, expected):
     assert hand_description(rank, tiebreakers).startswith(expected)
+
+
+@pytest.mark.parametrize(
+    "ranks, expected",
+    [
+        ([14, 5, 4, 3, 2], (True, [5])),
+        ([14, 13, 12, 11, 10], (True, [14])),
+        ([9, 8, 8, 7, 6, 5, 2], (True, [9])),
+        ([10, 9, 8, 7, 6, 5, 4], (True, [10])),
+        ([14, 13, 12, 11, 9], (False, [])),
+        ([14, 2, 3, 4, 6], (False, [])),
+    ],
+)
+def test_is_straight_bitmask(ranks, expected):
+    assert _is_straight(ranks) == expected
+
+
+def _best_by_combinations(cards7):
+    return max(evaluate_5cards(list(combo)) for combo in itertools.combinations(cards7, 5))
+
+
+@pytest.mark.parametrize(
+    "seven",
+    [
+        cards((14, "h"), (14, "d"), (14, "s"), (13, "c"), (13, "d"), (13, "h"), (2, "c")),
+        cards((9, "h"), (9, "d"), (5, "s"), (5, "c"), (3, "d"), (3, "h"), (2, "c")),
+        cards((14, "s"), (2, "s"), (3, "s"), (4, "s"), (5, "s"), (6, "d"), (13, "s")),
+        cards((7, "c"), (7, "d"), (7, "h"), (7, "s"), (12, "c"), (12, "d"), (12, "h")),
+        cards((14, "c"), (13, "c"), (2, "c"), (3, "c"), (9, "c"), (8, "c"), (4, "c")),
+    ],
+)
+def test_best_hand_from_seven_edge_cases(seven):
+    assert best_hand_from_seven(seven) == _best_by_combinations(seven)
+
+
+def test_best_hand_from_seven_matches_combinations():
+    rng = random.Random(1234)
+    deck = [(rank, suit) for rank in range(2, 15) for suit in "cdhs"]
+    for _ in range(3000):
+        hand = rng.sample(deck, rng.choice((5, 6, 7)))
+        assert best_hand_from_seven(hand) == _best_by_combinations(hand), hand
+
+
+def test_best_hand_from_seven_needs_five_cards():
+    assert best_hand_from_seven(cards((14, "h"), (14, "d"), (3, "c"))) == (-1, [])
+
+
+def test_estimate_equity_bounds_and_determinism():
+    # Royal flush on the board, nothing to improve: always a split
+    board = [(10, 's'), (11, 's'), (12, 's'), (13, 's'), (14, 's')]
+    assert estimate_equity([(2, 'c'), (3, 'd')], board, 2, 50, random.Random(0)) == pytest.approx(1 / 3)
+
+    aces = estimate_equity([(14, 's'), (14, 'h')], [], 1, 400, random.Random(1))
+    junk = estimate_equity([(7, 's'), (2, 'h')], [], 1, 400, random.Random(1))
+    assert 0.75 < aces <= 1.0
+    assert 0.0 <= junk < 0.45
+
+    assert estimate_equity([(9, 'h'), (3, 's')], board[:3], 1, 200, random.Random(7)) == \
+        estimate_equity([(9, 'h'), (3, 's')], board[:3], 1, 200, random.Random(7))
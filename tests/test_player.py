@@ -13,6 +13,9 @@ async def test_player_take_action_with_sync_actor(make_player):
 @pytest.mark.asyncio
 async def test_player_take_action_raises_when_no_actor():
     player = Player("bob")
+    assert player.max_rebuys is None
+    with pytest.raises(AttributeError):
+        player.chipz = 10
     with pytest.raises(NotImplementedError):
         await player.take_action({})
 
@@ -52,6 +55,8 @@ def test_player_manager_register_existing_player_returns_same_instance(database_
     first = pm.register_player("bob")
     second = pm.register_player("bob")
     assert first is second
+    assert pm.get_player("bob") is first
+    assert pm.get_player("nobody") is None
 
 
 def test_player_manager_register_ai_skips_wallet(monkeypatch):
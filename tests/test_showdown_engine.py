@@ -136,3 +136,28 @@ def test_showdown_skips_pot_without_hand_value(monkeypatch):
     assert players[0].chips == 0
     assert players[1].chips == 0
     assert engine.pot == 20
+
+
+def test_showdown_evaluates_each_hand_once(monkeypatch):
+    players = setup_players(
+        ("alice", 0, [card(14, "s"), card(13, "s")]),
+        ("bob", 0, [card(12, "h"), card(11, "h")]),
+    )
+
+    engine = GameEngine(players)
+    engine.community = [card(2, "h"), card(3, "d"), card(4, "s"), card(9, "c"), card(6, "h")]
+    engine.bets = {"alice": 10, "bob": 10}
+    engine.pot = 20
+
+    calls = []
+    original = showdown_module.best_hand_from_seven
+
+    def counting(cards):
+        calls.append(cards)
+        return original(cards)
+
+    monkeypatch.setattr(showdown_module, "best_hand_from_seven", counting)
+
+    result = ShowdownEngine(engine).evaluate_hands()
+    assert result["winners"] == ["alice"]
+    assert len(calls) == 2
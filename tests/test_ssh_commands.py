@@ -0,0 +1,84 @@
+import pytest
+
+from poker.ssh_commands import CommandProcessor, _HELP_TEXT
+
+
+class FakeWriter:
+    def __init__(self):
+        self.messages = []
+
+    def write(self, message):
+        self.messages.append(message)
+
+    async def drain(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, username="alice"):
+        self._stdout = FakeWriter()
+        self._username = username
+        self._current_room = "default"
+        self.stopped = False
+
+    async def _stop(self):
+        self.stopped = True
+
+
+def _recording_processor(monkeypatch):
+    processor = CommandProcessor(FakeSession())
+    calls = []
+    for table in (CommandProcessor._EXACT_COMMANDS.values(), (entry for _, entry in CommandProcessor._PREFIX_COMMANDS)):
+        for method, takes_cmd, _ in table:
+            if takes_cmd:
+                async def _handler(cmd, method=method):
+                    calls.append((method, cmd))
+            else:
+                async def _handler(method=method):
+                    calls.append((method, None))
+            monkeypatch.setattr(processor, method, _handler)
+    return processor, calls
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cmd, expected",
+    [
+        ("HELP", ("_show_help", None)),
+        ("tgc", ("_handle_toggle_cards", None)),
+        ("seat", ("_handle_seat", "seat")),
+        ("seat bob", ("_reject_seat_args", "seat bob")),
+        ("wallet", ("_handle_wallet", None)),
+        ("wallet history", ("_handle_wallet_command", "wallet history")),
+        ("roomctl join ABC", ("_handle_roomctl", "roomctl join ABC")),
+        ("registerkey ssh-ed25519 AAAA", ("_handle_register_key", "registerkey ssh-ed25519 AAAA")),
+    ],
+)
+async def test_process_command_dispatch(monkeypatch, cmd, expected):
+    processor, calls = _recording_processor(monkeypatch)
+    await processor.process_command(cmd)
+    assert calls == [expected]
+
+
+@pytest.mark.asyncio
+async def test_process_command_unknown_and_help_output():
+    processor = CommandProcessor(FakeSession())
+
+    await processor.process_command("dance")
+    assert processor.session._stdout.messages[0].startswith("❓ Unknown command: dance\r\n")
+
+    await processor.process_command("help")
+    assert processor.session._stdout.messages[-1] == _HELP_TEXT
+
+    await processor.process_command("exit")
+    assert processor.session.stopped is True
+
+
+@pytest.mark.asyncio
+async def test_whoami_is_a_single_write():
+    processor = CommandProcessor(FakeSession("bob"))
+
+    await processor.process_command("whoami")
+    (message,) = processor.session._stdout.messages
+    assert "bob" in message and "default" in message
+    assert message.endswith("❯ ")
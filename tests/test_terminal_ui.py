@@ -0,0 +1,10 @@
+from poker.terminal_ui import card_str, cards_horizontal
+
+
+def test_cards_horizontal_joins_card_lines():
+    cards = [(14, "s"), (10, "h")]
+    rendered = cards_horizontal(cards).split("\n")
+
+    ace, ten = card_str(cards[0]), card_str(cards[1])
+    assert rendered == [f"{a} {t}" for a, t in zip(ace, ten)]
+    assert cards_horizontal([]) == ""